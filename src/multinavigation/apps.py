@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class MultinavigationConfig(AppConfig):
+    # The app is installed either as 'multinavigation' or within a package
+    name = __name__.rpartition('.')[0]
+    label = 'multinavigation'
+    verbose_name = 'Multinavigation'
+
+    def ready(self):
+        from django.conf import settings
+        from .registry import registry
+        registry.load_from_settings()
+        if getattr(settings, 'MULTINAV_WARMUP', False):
+            registry.warm_up()
@@ -0,0 +1,86 @@
+"""
+Building the navigations of a request from async code, e.g. under ASGI.
+
+The nodes come from providers: a list of nodes, the name of a registered
+navigation, or a callable taking the request and returning a list of nodes.
+Providers can be coroutine functions (e.g. with labels from an async ORM
+query); sync ones are run with sync_to_async, so they don't block the event
+loop either. With
+
+    navigations = await aget_navigations(request, {'main': 'main', 'cms': cms_nodes})
+
+the providers run concurrently and the navigations are memoized on the
+request by name, so the template tags render them without running the
+providers again:
+
+    {% tabnavigation request "cms" %}
+
+multinavigation.middleware.NavigationMiddleware does this for the providers
+listed in MULTINAV_PROVIDERS.
+"""
+import asyncio
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from .navigation import get_navigation, get_request_memo
+
+
+def is_provider(provider):
+    return callable(provider) and not isinstance(provider, str)
+
+
+async def aget_nodes(request, provider):
+    """ Returns the nodes of provider for the request """
+    if not is_provider(provider):
+        return provider
+    if asyncio.iscoroutinefunction(provider):
+        return await provider(request)
+    return await sync_to_async(provider)(request)
+
+
+def get_nodes(request, provider):
+    """ Same as aget_nodes, for sync code """
+    if not is_provider(provider):
+        return provider
+    if asyncio.iscoroutinefunction(provider):
+        return async_to_sync(provider)(request)
+    return provider(request)
+
+
+def set_navigation(request, name, nodes, build=()):
+    navigation = get_navigation(request, nodes)
+    # the parts to build now, e.g. 'tree' or 'breadcrumbs'
+    for part in build:
+        getattr(navigation, part)
+    if name is not None:
+        get_request_memo(request)[name] = navigation
+    return navigation
+
+
+async def aget_navigation(request, provider, name=None, build=()):
+    """ Returns the Navigation of the request for the nodes of provider,
+    memoized on the request by name if given. build are the names of the
+    Navigation's parts to build now instead of when they're rendered (they're
+    built with sync_to_async). """
+    nodes = await aget_nodes(request, provider)
+    if build:
+        # building may use the ORM, e.g. to check the user's permissions
+        return await sync_to_async(set_navigation)(request, name, nodes, build)
+    return set_navigation(request, name, nodes, build)
+
+
+async def aget_navigations(request, providers, build=()):
+    """ Returns a dict with the Navigations of the request for a dict of
+    names and providers, running the providers concurrently """
+    names = list(providers)
+    navigations = await asyncio.gather(*(
+        aget_navigation(request, providers[name], name, build) for name in names))
+    return dict(zip(names, navigations))
+
+
+def get_navigations(request, providers, build=()):
+    """ Same as aget_navigations, for sync code (the providers run one after
+    the other) """
+    return dict(
+        (name, set_navigation(request, name, get_nodes(request, provider), build))
+        for name, provider in providers.items())
@@ -0,0 +1,129 @@
+"""
+The navigation state of many paths at once, e.g. for a static export or to
+check a sitemap, without a request for each path:
+
+    for state in iter_navigations('main', paths):
+        print(state.path, [n.label for n in state.breadcrumbs])
+
+The compiled navigation, its static URLs and the reversed URLs are shared
+by all the paths. Paths are resolved once each and grouped by url_name and
+by the kwargs the nodes with placeholders depend on, so the paths sharing
+URLs are handled together (by the same process, with processes). The
+states are yielded by group, not in the order of paths.
+
+Visibility predicates (see multinavigation.visibility) get a BatchRequest,
+which only has the path and the user.
+"""
+from collections import namedtuple
+import multiprocessing
+
+from .compiled import get_compiled_navigation
+from .navigation import Navigation, get_url_match, make_navigation
+from .registry import registry
+from .visibility import Visibility
+
+""" The part of a django.urls.ResolverMatch a Navigation needs """
+PathMatch = namedtuple('PathMatch', 'url_name kwargs')
+
+""" The navigation state of a path: the indexes of the active nodes, and
+the breadcrumbs and subnavigation tree nodes (empty lists if the path can't
+be resolved) """
+PathNavigation = namedtuple('PathNavigation', 'path active breadcrumbs subnavigation')
+
+
+class BatchRequest(object):
+    """ The part of a request a Navigation needs """
+    __slots__ = ('path', 'user')
+
+    def __init__(self, path, user=None):
+        self.path = path
+        self.user = user
+
+
+def group_paths(nodes, paths):
+    """ Resolves the paths and returns them as lists of (path, PathMatch)
+    grouped by url_name and by the kwargs the nodes with placeholders depend
+    on. Paths which can't be resolved are grouped with None. """
+    if isinstance(nodes, str):
+        compiled = registry.get(nodes).compiled
+    else:
+        compiled = get_compiled_navigation(nodes)
+    keys = sorted(compiled.dynamic_keys)
+    groups = {}
+    for path in paths:
+        match = get_url_match(BatchRequest(path))
+        if not match or not match.url_name:
+            groups.setdefault(None, []).append((path, None))
+            continue
+        key = (match.url_name, tuple(match.kwargs.get(k) for k in keys))
+        groups.setdefault(key, []).append((path, PathMatch(match.url_name, match.kwargs)))
+    return list(groups.values())
+
+
+def get_shared_state(nodes):
+    """ Returns the compiled navigation and the Visibility of a list of
+    nodes, to share between the Navigations of all the paths. Registered
+    navigations keep their own, (None, None) is returned for them. """
+    if isinstance(nodes, str):
+        return None, None
+    compiled = get_compiled_navigation(nodes)
+    return compiled, Visibility(nodes, compiled)
+
+
+def navigate_group(nodes, group, user=None, compiled=None, visibility=None):
+    """ Returns the PathNavigations for a group of (path, PathMatch). For a
+    list of nodes, pass the compiled navigation and its Visibility (see
+    get_shared_state) to share them between groups, else they're built for
+    the group. """
+    if compiled is None and not isinstance(nodes, str):
+        compiled, visibility = get_shared_state(nodes)
+    states = []
+    for path, match in group:
+        if match is None:
+            states.append(PathNavigation(path, frozenset(), [], []))
+            continue
+        request = BatchRequest(path, user)
+        if compiled is None:
+            navigation = make_navigation(request, nodes, match)
+        else:
+            navigation = Navigation(request, nodes, match, compiled=compiled,
+                    visibility=visibility)
+        states.append(PathNavigation(path, navigation.active_indexes,
+                navigation.breadcrumbs, navigation.subnavigation))
+    return states
+
+
+# What the workers of iter_navigations share: the nodes, the user, the
+# compiled navigation and its Visibility
+_worker_state = None
+
+
+def _init_worker(nodes, user):
+    global _worker_state
+    _worker_state = (nodes, user) + get_shared_state(nodes)
+
+
+def _navigate_group(group):
+    nodes, user, compiled, visibility = _worker_state
+    return navigate_group(nodes, group, user, compiled, visibility)
+
+
+def iter_navigations(nodes, paths, user=None, processes=None, chunksize=500):
+    """
+    Yields the PathNavigation of each path for the nodes (or the name of a
+    registered navigation). With processes, the groups (split in chunks of
+    up to chunksize paths) are spread over a pool of that many processes,
+    started with the multiprocessing default method: with fork, the workers
+    share the state loaded so far (e.g. the registered navigations). nodes
+    and user are pickled once per worker, the states once each.
+    """
+    groups = group_paths(nodes, paths)
+    if not processes:
+        compiled, visibility = get_shared_state(nodes)
+        for group in groups:
+            yield from navigate_group(nodes, group, user, compiled, visibility)
+        return
+    chunks = [group[i:i + chunksize] for group in groups for i in range(0, len(group), chunksize)]
+    with multiprocessing.Pool(processes, _init_worker, (nodes, user)) as pool:
+        for states in pool.imap(_navigate_group, chunks):
+            yield from states
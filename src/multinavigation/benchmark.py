@@ -0,0 +1,201 @@
+"""
+Benchmarks for the navigation template tags on synthetic navigations.
+
+Run it with:
+
+    python -m multinavigation.benchmark --sizes 10 100 1000 --depths 1 4 8
+
+For every size, depth and tag it reports the time to build the navigation
+and the time to render it (both in ms, median of --repeat runs), the number
+of reverse() and resolve() calls and the memory allocated while building.
+The build time and the calls are also reported for a cold run, before
+anything is compiled, reversed or resolved (the cold_ columns).
+If Django isn't configured yet, it's configured with the example templates.
+"""
+import argparse
+from collections import deque
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+from unittest import mock
+
+from django.conf import settings
+
+APP = __package__
+TAGS = ('tabnavigation', 'flattabnavigation', 'flatnavigation', 'subnavigation', 'breadcrumbs')
+# The Navigation attribute each tag renders
+TAG_ATTRS = {
+    'tabnavigation': 'tree',
+    'flattabnavigation': 'flattened',
+    'flatnavigation': 'flat',
+    'subnavigation': 'subnavigation',
+    'breadcrumbs': 'breadcrumbs',
+}
+
+
+def view(request, **kwargs):
+    pass
+
+
+def generate(size, depth, placeholders=False):
+    """
+    Returns (nodes, urlpatterns, path) for a navigation of size nodes, up to
+    depth levels deep, where path is the URL of the last (deepest) node. With
+    placeholders all URLs start with a 'section' kwarg, filled in from the
+    request.
+    """
+    from django.urls import re_path
+    from .conf import Node
+
+    branching = max(2, int(math.ceil(size ** (1.0 / depth))))
+    prefix = '(?P<section>[a-z]+)/' if placeholders else ''
+    context = {'url_kwargs': 'section:'} if placeholders else {}
+    nodes = []
+    urlpatterns = []
+    path = '/'
+    # (url_name, path, level) of the nodes to add children to, starting with
+    # a pseudo-node for the roots
+    queue = deque([('', '', 0)])
+    while queue and len(nodes) < size:
+        parent, parent_path, level = queue.popleft()
+        if level >= depth:
+            continue
+        for i in range(branching):
+            if len(nodes) >= size:
+                break
+            name = '{}-{}'.format(parent, i) if parent else 'n{}'.format(i)
+            node_path = '{}{}/'.format(parent_path, name)
+            nodes.append(Node(name, name.upper(), parent, context))
+            urlpatterns.append(re_path('^{}{}$'.format(prefix, node_path), view, name=name))
+            queue.append((name, node_path, level + 1))
+            path = '/{}{}'.format('main/' if placeholders else '', node_path)
+    return nodes, urlpatterns, path
+
+
+class Counter(object):
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.func(*args, **kwargs)
+
+
+def measure(nodes, path, tag, repeat):
+    """ Returns the measures for one tag (see the module's docstring) """
+    from django.template import Context, Template
+    from django.test import RequestFactory
+    from . import resolvers
+    from .compiled import compile_structure
+    from .navigation import get_navigation
+
+    template = Template('{{% load multinavigation %}}{{% {} request nodes %}}'.format(tag))
+    factory = RequestFactory()
+    build_times, render_times = [], []
+    reverse_counter = Counter(resolvers.reverse)
+    resolve_counter = Counter(resolvers.resolve)
+    with mock.patch.object(resolvers, 'reverse', reverse_counter), \
+            mock.patch.object(resolvers, 'resolve', resolve_counter):
+        # cold run, which also warms up: compile the navigation and fill the
+        # caches
+        resolvers.clear_caches()
+        compile_structure.cache_clear()
+        start = time.perf_counter()
+        getattr(get_navigation(factory.get(path), nodes), TAG_ATTRS[tag])
+        cold_time = time.perf_counter() - start
+        cold_reverse, cold_resolve = reverse_counter.calls, resolve_counter.calls
+        reverse_counter.calls = resolve_counter.calls = 0
+        for i in range(repeat):
+            request = factory.get(path)
+            start = time.perf_counter()
+            getattr(get_navigation(request, nodes), TAG_ATTRS[tag])
+            build_times.append(time.perf_counter() - start)
+            # the tag renders the navigation built above
+            start = time.perf_counter()
+            template.render(Context({'request': request, 'nodes': nodes}))
+            render_times.append(time.perf_counter() - start)
+    # allocations are traced on a separate run, since tracing slows it down
+    request = factory.get(path)
+    tracemalloc.start()
+    getattr(get_navigation(request, nodes), TAG_ATTRS[tag])
+    allocated = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'cold_ms': cold_time * 1000,
+        'cold_reverse': cold_reverse,
+        'cold_resolve': cold_resolve,
+        'build_ms': statistics.median(build_times) * 1000,
+        'render_ms': statistics.median(render_times) * 1000,
+        'reverse': reverse_counter.calls / repeat,
+        'resolve': resolve_counter.calls / repeat,
+        'alloc_kb': allocated / 1024,
+    }
+
+
+def run_benchmark(sizes, depths, placeholders=(False, True), tags=TAGS, repeat=5):
+    """ Yields a dict of measures for every combination of the arguments """
+    from django.test.utils import override_settings
+
+    for size in sizes:
+        for depth in depths:
+            for with_placeholders in placeholders:
+                nodes, urlpatterns, path = generate(size, depth, with_placeholders)
+                urlconf = types.ModuleType('multinavigation_benchmark_urls')
+                urlconf.urlpatterns = urlpatterns
+                sys.modules[urlconf.__name__] = urlconf
+                try:
+                    with override_settings(ROOT_URLCONF=urlconf.__name__):
+                        for tag in tags:
+                            result = measure(nodes, path, tag, repeat)
+                            result.update(size=len(nodes), depth=depth,
+                                    placeholders=with_placeholders, tag=tag)
+                            yield result
+                finally:
+                    del sys.modules[urlconf.__name__]
+
+
+def setup():
+    """ Configures Django with the example templates, if needed """
+    import os
+    import django
+
+    if not settings.configured and 'DJANGO_SETTINGS_MODULE' not in os.environ:
+        templates = os.path.join(os.path.dirname(__file__), 'examples', 'simple_templates')
+        settings.configure(
+            INSTALLED_APPS=[APP],
+            ROOT_URLCONF=None,
+            TEMPLATES=[{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'DIRS': [templates],
+            }],
+        )
+    django.setup()
+
+
+COLUMNS = ('size', 'depth', 'placeholders', 'tag', 'cold_ms', 'cold_reverse', 'cold_resolve',
+        'build_ms', 'render_ms', 'reverse', 'resolve', 'alloc_kb')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--depths', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--tags', nargs='+', default=list(TAGS), choices=TAGS)
+    parser.add_argument('--placeholders', choices=['yes', 'no', 'both'], default='both')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    setup()
+    placeholders = {'yes': (True,), 'no': (False,), 'both': (False, True)}[args.placeholders]
+    print('\t'.join(COLUMNS))
+    for result in run_benchmark(args.sizes, args.depths, placeholders, args.tags, args.repeat):
+        print('\t'.join(
+            '{:.3f}'.format(result[c]) if isinstance(result[c], float) else str(result[c])
+            for c in COLUMNS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Optional cache for the rendered output of the navigation template tags.
+
+Enable it by setting MULTINAV_FRAGMENT_CACHE to the alias of one of the
+CACHES (MULTINAV_FRAGMENT_CACHE_TIMEOUT sets the timeout, the cache's default
+timeout is used otherwise). Cached fragments are keyed by the logical state
+of the navigation, so the navigation templates should only depend on the
+nodes; anything else from the page's context (passed as 'context') would be
+cached too. On a cache hit tabnavigation doesn't set 'nodes' on the page's
+context.
+"""
+import hashlib
+from time import perf_counter
+
+from django import template
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import get_language
+
+from .navigation import get_navigation
+from .resolvers import get_reverse_key
+from .stats import count, get_stats
+
+KEY_PREFIX = 'multinavigation'
+
+
+def get_fragment_cache():
+    """ Returns the cache to be used for fragments, or None if disabled """
+    alias = getattr(settings, 'MULTINAV_FRAGMENT_CACHE', None)
+    if not alias:
+        return None
+    return caches[alias]
+
+
+def get_fragment_cache_key(template_name, navigation):
+    """
+    Returns the cache key for the output of a navigation template: requests
+    landing on the same logical navigation state (same nodes, same active
+    nodes, same values for the kwargs of the nodes with placeholders, same
+    language and script prefix, same visible nodes) share the same key.
+    """
+    url_kwargs = navigation.url_match.kwargs
+    dynamic_kwargs = sorted((k, str(url_kwargs.get(k)))
+            for k in navigation.compiled.dynamic_keys)
+    state = (
+        template_name,
+        navigation.fingerprint,
+        sorted(navigation.active_indexes),
+        dynamic_kwargs,
+        get_reverse_key(),
+        get_language(),
+        navigation.visibility_key,
+    )
+    digest = hashlib.md5(repr(state).encode('utf-8')).hexdigest()
+    return '{}:{}'.format(KEY_PREFIX, digest)
+
+
+class FragmentCacheNode(template.Node):
+    """ Wraps the InclusionNode of a navigation tag to cache its output and
+    to time its rendering (see multinavigation.stats) """
+
+    def __init__(self, node):
+        self.node = node
+
+    def render(self, context):
+        stats = get_stats()
+        if stats is None:
+            return self.render_cached(context)
+        start = perf_counter()
+        build_time = stats.build_time
+        try:
+            return self.render_cached(context)
+        finally:
+            stats.render_time += perf_counter() - start - (stats.build_time - build_time)
+
+    def render_cached(self, context):
+        cache = get_fragment_cache()
+        if cache is None:
+            return self.node.render(context)
+        args, _ = self.node.get_resolved_arguments(context)
+        # args are: context, request, nodes
+        navigation = get_navigation(args[1], args[2])
+        if not navigation.is_resolved or navigation.request_path is None:
+            return self.node.render(context)
+        key = get_fragment_cache_key(self.node.filename, navigation)
+        output = cache.get(key)
+        if output is not None:
+            count('fragment_hits')
+        else:
+            count('fragment_misses')
+            output = self.node.render(context)
+            timeout = getattr(settings, 'MULTINAV_FRAGMENT_CACHE_TIMEOUT', None)
+            if timeout is None:
+                cache.set(key, output)
+            else:
+                cache.set(key, output, timeout)
+        return output
+
+
+def fragment_cached(register, name):
+    """ Makes the inclusion tag registered as name cache its output """
+    compile_func = register.tags[name]
+
+    def compile_cached(parser, token):
+        return FragmentCacheNode(compile_func(parser, token))
+
+    register.tags[name] = compile_cached
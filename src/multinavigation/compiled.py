@@ -0,0 +1,452 @@
+from bisect import insort
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from itertools import chain, combinations
+import pickle
+
+from . import resolvers
+from .resolvers import cached_reverse, get_reverse_key, reverse_for_key, safe_reverse
+from .trie import PathTrie
+from .utils import EMPTY_KWARGS_SPEC, parse_kwargs_spec, parse_parent_spec, resolve_kwargs
+
+# Max. number of ActivePaths kept by each compiled navigation
+ACTIVE_PATHS_SIZE = 1024
+
+""" The active state of a request: the indexes of the active nodes, the
+parents of the nodes on the active branches (by index) and the indexes of
+the breadcrumbs, with all the nodes visible """
+ActivePath = namedtuple('ActivePath', 'active parents breadcrumbs')
+
+EMPTY_ACTIVE_PATH = ActivePath(frozenset(), {}, ())
+
+
+def get_structure(nodes):
+    """ Returns the part of a list of multinavigation.conf.Node which defines
+    the shape of the navigation, as a hashable tuple of
+    (url_name, parent, url_kwargs) entries. Labels and the rest of the context
+    are left out, since they don't affect which node is a child of which.
+    Removed nodes (None, see CompiledNavigation.remove) are kept as None. """
+    structure = []
+    for n in nodes:
+        if n is None:
+            structure.append(None)
+            continue
+        url_kwargs = n.context.get('url_kwargs', '')
+        structure.append((n.url_name, n.parent, str(url_kwargs) if url_kwargs else ''))
+    return tuple(structure)
+
+
+class CompiledNavigation(object):
+    """
+    A parent -> children index over a navigation structure (see
+    get_structure). Nodes are referred to by their position on the original
+    list, so the same compiled navigation can be used with any list of nodes
+    sharing the same structure.
+
+    Children are grouped by the parent spec they define, i.e. by
+    (url_name, frozen kwargs), so finding the children of a node only needs
+    to check the few specs defined for its url_name instead of all nodes.
+
+    All parent and url_kwargs specs are parsed here, so a malformed spec
+    raises a multinavigation.utils.SpecError when compiling.
+
+    Nodes without placeholders in their url_kwargs are static: their URL and
+    their children don't depend on the request. Their children are computed
+    here and their URLs are reversed once (per urlconf, script prefix and
+    language) the first time they're needed, so only the nodes with
+    placeholders have to be resolved against each request. The static URLs
+    are also kept in a PathTrie, to find all the active static nodes for a
+    request path with one walk down the trie.
+
+    A node is static_subtree if it and all its descendants are static, so
+    while none of them is active the tree nodes built for it are the same
+    on every request (see multinavigation.navigation.Navigation.add_nodes).
+
+    Nodes can be added, removed and moved without compiling the navigation
+    again: only the entries of the indexes, the static URLs and the trie
+    paths depending on the node are updated. versions has a counter for each
+    node, bumped whenever its subtree changes, so anything built for the
+    other subtrees can be kept.
+    """
+
+    def __init__(self, structure):
+        self.structure = structure
+        self.roots = tuple(i for i, entry in enumerate(structure) if entry and not entry[1])
+        self.kwargs_specs = [parse_kwargs_spec(entry[2]) if entry else EMPTY_KWARGS_SPEC
+                for entry in structure]
+        self.parent_specs = [parse_parent_spec(entry[1]) if entry and entry[1] else None
+                for entry in structure]
+        self.by_url_name = {}
+        groups = {}
+        for i, (entry, spec) in enumerate(zip(structure, self.parent_specs)):
+            if entry is None:
+                continue
+            self.by_url_name.setdefault(entry[0], []).append(i)
+            if spec is not None:
+                groups.setdefault(spec, []).append(i)
+        # (url_name, parent kwargs) -> child indexes
+        self.children_index = dict((spec, tuple(children)) for spec, children in groups.items())
+        # url_name -> [parent kwargs, ...] of the children_index keys
+        self.parent_kwargs = {}
+        for url_name, kwargs in groups:
+            self.parent_kwargs.setdefault(url_name, []).append(kwargs)
+        self.static_children = [self._get_static_children(i) for i in range(len(structure))]
+        self.static_subtree = self._get_static_subtrees(range(len(structure)))
+        self.dynamic = tuple(i for i, spec in enumerate(self.kwargs_specs) if spec.placeholders)
+        self.dynamic_keys = self._get_dynamic_keys()
+        # bumped for a node and its ancestors whenever its subtree changes
+        self.versions = [0] * len(structure)
+        self._static_urls = {}
+        self._static_urls_generation = resolvers.generation
+        # ActivePaths by reverse key, url_name, kwargs and path, least
+        # recently used first
+        self._active_paths = OrderedDict()
+
+    def _get_static_children(self, index):
+        if self.structure[index] is None:
+            return ()
+        spec = self.kwargs_specs[index]
+        if spec.placeholders:
+            return None
+        return self.get_children(index, dict(spec.fixed))
+
+    def _get_static_subtrees(self, indexes, static_subtree=None):
+        """ Returns the static_subtree flags, computed for indexes and taken
+        from static_subtree for the rest """
+        result = {}
+        if static_subtree is not None:
+            indexes = set(indexes)
+            result.update((i, flag) for i, flag in enumerate(static_subtree)
+                    if i not in indexes)
+
+        def visit(i):
+            if i not in result:
+                # nodes on a cycle aren't static subtrees
+                result[i] = False
+                children = self.static_children[i]
+                result[i] = children is not None and all(visit(c) for c in children)
+            return result[i]
+
+        for i in indexes:
+            visit(i)
+        return [result[i] for i in range(len(self.structure))]
+
+    def _get_dynamic_keys(self):
+        # all the kwargs the URLs of the dynamic nodes depend on
+        return frozenset(chain.from_iterable(
+            chain((k for k, _ in self.kwargs_specs[i].fixed), self.kwargs_specs[i].placeholders)
+            for i in self.dynamic))
+
+    def __len__(self):
+        return len(self.structure)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_active_paths']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # the static URLs were reversed by another process, only keep them
+        # until the caches are cleared in this one
+        self._static_urls_generation = resolvers.generation
+        self._active_paths = OrderedDict()
+
+    def copy(self):
+        """ Returns a copy to be updated without changing this one (e.g. the
+        one shared through compile_structure) """
+        clone = pickle.loads(pickle.dumps(self, pickle.HIGHEST_PROTOCOL))
+        clone._static_urls_generation = self._static_urls_generation
+        return clone
+
+    def get_children(self, index, kwargs):
+        """ Returns the indexes of the children of the node at index, given
+        the url kwargs the node resolves to for the current request. Children
+        are returned in the same order as they're defined on the list. """
+        url_name = self.structure[index][0]
+        groups = self.parent_kwargs.get(url_name)
+        if not groups:
+            return ()
+        items = frozenset(kwargs.items())
+        if 2 ** len(items) <= len(groups):
+            # look the subsets of the kwargs up (nodes have one or two)
+            subsets = chain.from_iterable(
+                combinations(items, n) for n in range(len(items) + 1))
+            matching = [self.children_index[key] for key in
+                    ((url_name, frozenset(subset)) for subset in subsets)
+                    if key in self.children_index]
+        else:
+            matching = [self.children_index[(url_name, p_kwargs)]
+                    for p_kwargs in groups if p_kwargs <= items]
+        if not matching:
+            return ()
+        if len(matching) == 1:
+            return matching[0]
+        return tuple(sorted(chain.from_iterable(matching)))
+
+    def get_parents(self, index, url_match):
+        """ Returns the indexes of all the nodes the node at index is a child
+        of for the current request (the reverse of get_children). """
+        spec = self.parent_specs[index]
+        if spec is None:
+            return ()
+        return tuple(p for p in self.by_url_name.get(spec.url_name, ())
+                if spec.kwargs.issubset(self.resolve_kwargs(p, url_match).items()))
+
+    def get_possible_parents(self, index):
+        """ Returns the indexes of the nodes the node at index can be a child
+        of, for any request: placeholders are assumed to match any value. """
+        spec = self.parent_specs[index]
+        if spec is None:
+            return ()
+        parents = []
+        for p in self.by_url_name.get(spec.url_name, ()):
+            fixed = dict(self.kwargs_specs[p].fixed)
+            placeholders = self.kwargs_specs[p].placeholders
+            if all(fixed.get(k) == v or k in placeholders for k, v in spec.kwargs):
+                parents.append(p)
+        return tuple(parents)
+
+    def get_ancestors(self, indexes):
+        """ Returns the indexes and all their possible ancestors """
+        ancestors = set()
+        stack = list(indexes)
+        while stack:
+            i = stack.pop()
+            if i not in ancestors:
+                ancestors.add(i)
+                stack.extend(self.get_possible_parents(i))
+        return ancestors
+
+    def is_static(self, index):
+        return self.static_children[index] is not None
+
+    def resolve_kwargs(self, index, url_match):
+        """ Returns the url kwargs of the node at index for the request """
+        return resolve_kwargs(self.kwargs_specs[index], url_match)
+
+    def _check_generation(self):
+        """ Drops the URLs and ActivePaths found before the caches were
+        cleared. Returns False if they were dropped. """
+        if self._static_urls_generation == resolvers.generation:
+            return True
+        self._static_urls = {}
+        self._active_paths = OrderedDict()
+        self._static_urls_generation = resolvers.generation
+        return False
+
+    def _get_static_table(self):
+        self._check_generation()
+        key = get_reverse_key()
+        table = self._static_urls.get(key)
+        if table is None:
+            urls = tuple(self._reverse_static(i) for i in range(len(self.structure)))
+            trie = PathTrie()
+            for i, url in enumerate(urls):
+                if url is not None:
+                    trie.insert(url, i)
+            table = self._static_urls[key] = (urls, trie)
+        return table
+
+    def _reverse_static(self, index, key=None):
+        """ Returns the URL of the node at index if it's static, else None.
+        key is the reverse key to reverse it for, the current one if None. """
+        if self.static_children[index] is None:
+            return None
+        if self.structure[index] is None:
+            return ''
+        url_name = self.structure[index][0]
+        kwargs = dict(self.kwargs_specs[index].fixed)
+        if key is None:
+            return safe_reverse(url_name, kwargs)
+        return reverse_for_key(url_name, kwargs, key)
+
+    def get_static_urls(self):
+        """ Returns the URLs of all static nodes (None for the rest) for the
+        current urlconf, script prefix and language. """
+        return self._get_static_table()[0]
+
+    def get_active_indexes(self, path):
+        """ Returns the indexes of the static nodes active for path """
+        return frozenset(self._get_static_table()[1].match(path))
+
+    def get_active_path(self, key):
+        """ Returns the ActivePath memoized for key (see set_active_path),
+        or None """
+        self._check_generation()
+        try:
+            self._active_paths.move_to_end(key)
+            return self._active_paths[key]
+        except KeyError:
+            # unknown, or dropped by another thread in between
+            return None
+
+    def set_active_path(self, key, active_path):
+        """ Memoizes an ActivePath for key, which must include all the
+        request state it depends on: the reverse key, the url_name and
+        kwargs of the request and its path. The least recently used ones are
+        dropped beyond ACTIVE_PATHS_SIZE. """
+        self._active_paths[key] = active_path
+        while len(self._active_paths) > ACTIVE_PATHS_SIZE:
+            try:
+                self._active_paths.popitem(last=False)
+            except KeyError:
+                break
+
+    def resolve_node(self, index, url_match, static_urls):
+        """ Returns the URL ('' if it can't be reversed) and the children
+        indexes of the node at index for the current request. static_urls
+        are the ones returned by get_static_urls. """
+        url = static_urls[index]
+        if url is not None:
+            return url, self.static_children[index]
+        kwargs = resolve_kwargs(self.kwargs_specs[index], url_match)
+        return cached_reverse(self.structure[index][0], kwargs), self.get_children(index, kwargs)
+
+    # Incremental updates. They patch the compiled navigation in place, so
+    # use them on a copy of one which is shared or used by requests (see
+    # multinavigation.registry.RegisteredNavigation).
+
+    def add(self, entry):
+        """ Adds a node with a structure entry (url_name, parent, url_kwargs)
+        at the end and returns its index """
+        index = len(self.structure)
+        self.structure += (None,)
+        for attr, value in (('kwargs_specs', EMPTY_KWARGS_SPEC), ('parent_specs', None),
+                ('static_children', ()), ('static_subtree', True), ('versions', 0)):
+            getattr(self, attr).append(value)
+        self._static_urls = dict(
+            (key, (urls + (None,), trie)) for key, (urls, trie) in self._static_urls.items())
+        self._update(index, entry)
+        return index
+
+    def remove(self, index):
+        """ Removes the node at index. Its index stays taken, by None. """
+        self._update(index, None)
+
+    def move(self, index, parent):
+        """ Sets the parent spec of the node at index. It keeps its position
+        on the list, so it's ordered by it among its new siblings. """
+        url_name, _, url_kwargs = self.structure[index]
+        self._update(index, (url_name, parent, url_kwargs))
+
+    def touch(self, index):
+        """ Bumps the version of the node at index and its ancestors, e.g.
+        when it's relabelled """
+        for i in self.get_ancestors([index]):
+            self.versions[i] += 1
+
+    def _update(self, index, entry):
+        # the active state of any request can change
+        self._active_paths = OrderedDict()
+        old = self.structure[index]
+        old_kwargs_spec = self.kwargs_specs[index]
+        old_parent_spec = self.parent_specs[index]
+        affected = {index}
+        if old_parent_spec is not None:
+            affected.update(self.by_url_name.get(old_parent_spec.url_name, ()))
+        # the nodes whose subtree changes, before and after the update
+        changed = self.get_ancestors(affected)
+
+        # take the old entry out of the indexes
+        if old is not None:
+            self.by_url_name[old[0]].remove(index)
+            if not self.by_url_name[old[0]]:
+                del self.by_url_name[old[0]]
+        if old_parent_spec is not None:
+            self._remove_child(old_parent_spec, index)
+
+        self.structure = self.structure[:index] + (entry,) + self.structure[index + 1:]
+        self.kwargs_specs[index] = parse_kwargs_spec(entry[2]) if entry else EMPTY_KWARGS_SPEC
+        parent_spec = self.parent_specs[index] = (
+            parse_parent_spec(entry[1]) if entry and entry[1] else None)
+        if entry is not None:
+            insort(self.by_url_name.setdefault(entry[0], []), index)
+        if parent_spec is not None:
+            self._add_child(parent_spec, index)
+            affected.update(self.by_url_name.get(parent_spec.url_name, ()))
+        roots = set(self.roots)
+        roots.discard(index)
+        if entry is not None and not entry[1]:
+            roots.add(index)
+        self.roots = tuple(sorted(roots))
+
+        for i in affected:
+            self.static_children[i] = self._get_static_children(i)
+        changed |= self.get_ancestors(affected)
+        self.static_subtree = self._get_static_subtrees(changed, self.static_subtree)
+        for i in changed:
+            self.versions[i] += 1
+        if bool(old_kwargs_spec.placeholders) != bool(self.kwargs_specs[index].placeholders) \
+                or self.kwargs_specs[index].placeholders:
+            self.dynamic = tuple(i for i, spec in enumerate(self.kwargs_specs) if spec.placeholders)
+            self.dynamic_keys = self._get_dynamic_keys()
+
+        # the URL only depends on the url_name and the url_kwargs
+        if old is None or entry is None or old[0] != entry[0] or old[2] != entry[2]:
+            self._update_static_urls(index)
+
+    def _remove_child(self, parent_spec, index):
+        children = tuple(c for c in self.children_index[parent_spec] if c != index)
+        if children:
+            self.children_index[parent_spec] = children
+            return
+        del self.children_index[parent_spec]
+        groups = self.parent_kwargs[parent_spec.url_name]
+        groups.remove(parent_spec.kwargs)
+        if not groups:
+            del self.parent_kwargs[parent_spec.url_name]
+
+    def _add_child(self, parent_spec, index):
+        children = self.children_index.get(parent_spec)
+        if children is None:
+            self.children_index[parent_spec] = (index,)
+            self.parent_kwargs.setdefault(parent_spec.url_name, []).append(parent_spec.kwargs)
+        else:
+            self.children_index[parent_spec] = tuple(sorted(children + (index,)))
+
+    def _update_static_urls(self, index):
+        if not self._check_generation():
+            return
+        for key, (urls, trie) in list(self._static_urls.items()):
+            old_url = urls[index]
+            url = self._reverse_static(index, key)
+            if old_url is not None:
+                trie.remove(old_url, index)
+            if url is not None:
+                trie.insert(url, index)
+            urls = urls[:index] + (url,) + urls[index + 1:]
+            self._static_urls[key] = (urls, trie)
+
+
+@lru_cache(maxsize=32)
+def compile_structure(structure):
+    return CompiledNavigation(structure)
+
+
+def get_compiled_navigation(nodes):
+    """ Returns the (cached) CompiledNavigation for a list of nodes """
+    return compile_structure(get_structure(nodes))
+
+
+# Bumped whenever the pickled format of CompiledNavigation changes
+ARTIFACT_VERSION = 4
+
+
+def dump_compiled(compiled_navigations, path):
+    """ Writes a dict of names and CompiledNavigations to path (see the
+    multinav_compile management command) """
+    with open(path, 'wb') as f:
+        pickle.dump({'version': ARTIFACT_VERSION, 'navigations': compiled_navigations}, f,
+                pickle.HIGHEST_PROTOCOL)
+
+
+def load_compiled(path):
+    """ Returns the dict of names and CompiledNavigations written to path by
+    dump_compiled, or an empty dict if it was written by another version.
+    Only load files written by your own deployment, they're pickled. """
+    with open(path, 'rb') as f:
+        artifact = pickle.load(f)
+    if artifact.get('version') != ARTIFACT_VERSION:
+        return {}
+    return artifact['navigations']
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.translation import override
+
+from ...compiled import CompiledNavigation, dump_compiled, get_structure
+from ...registry import get_warmup_languages, registry
+from ...validation import validate_navigation
+
+
+class Command(BaseCommand):
+    help = (
+        'Validates the registered navigations (see MULTINAV_NAVIGATIONS) '
+        'against the urlconf and writes them, compiled, to '
+        'MULTINAV_COMPILED_PATH (or --output), to be loaded on startup.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Overrides MULTINAV_COMPILED_PATH')
+        parser.add_argument('--check', action='store_true',
+                help='Only validate, don\'t write the compiled navigations')
+
+    def handle(self, *args, **options):
+        output = options['output'] or getattr(settings, 'MULTINAV_COMPILED_PATH', None)
+        has_errors = False
+        compiled_navigations = {}
+        for registered in registry:
+            errors, warnings = validate_navigation(registered.nodes)
+            for message in errors:
+                self.stderr.write('{}: {}'.format(registered.name, message))
+            for message in warnings:
+                self.stdout.write(self.style.WARNING('{}: {}'.format(registered.name, message)))
+            if errors:
+                has_errors = True
+                continue
+            compiled = CompiledNavigation(get_structure(registered.nodes))
+            # reverse the static URLs and build the trie now, under the same
+            # keys the requests look them up with
+            for language in get_warmup_languages():
+                with override(language):
+                    compiled.get_static_urls()
+            compiled_navigations[registered.name] = compiled
+            self.stdout.write('{}: {} nodes OK'.format(registered.name, len(compiled)))
+        if has_errors:
+            raise CommandError('Some navigations are not valid')
+        if options['check']:
+            return
+        if not output:
+            raise CommandError('Set MULTINAV_COMPILED_PATH or --output to write the compiled navigations')
+        dump_compiled(compiled_navigations, output)
+        self.stdout.write(self.style.SUCCESS(
+            'Wrote {} compiled navigation(s) to {}'.format(len(compiled_navigations), output)))
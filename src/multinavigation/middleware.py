@@ -0,0 +1,70 @@
+import asyncio
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .asynchronous import aget_navigations, get_navigations
+from .stats import NavigationStats, navigation_stats, set_stats
+
+
+class NavigationStatsMiddleware(object):
+    """ Collects the NavigationStats of each request and reports them (see
+    multinavigation.stats) """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        callback = getattr(settings, 'MULTINAV_STATS_CALLBACK', None)
+        self.callback = import_string(callback) if callback else None
+        self.header = getattr(settings, 'MULTINAV_STATS_HEADER', None)
+
+    def __call__(self, request):
+        stats = request.navigation_stats = NavigationStats()
+        set_stats(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            set_stats(None)
+        self.report(request, response, stats)
+        return response
+
+    def report(self, request, response, stats):
+        navigation_stats.send(sender=self.__class__, request=request, stats=stats)
+        if self.callback is not None:
+            self.callback(request, stats)
+        if self.header:
+            response[self.header] = str(stats)
+
+
+class NavigationMiddleware(object):
+    """
+    Builds the navigations of the providers listed in MULTINAV_PROVIDERS (a
+    dict of names and dotted paths to providers, see
+    multinavigation.asynchronous) for each request and sets them as
+    request.navigations, a dict by name. The template tags take the names.
+
+    It runs as async middleware if the next one is async, fetching the
+    nodes of all the providers concurrently.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.providers = dict(
+            (name, import_string(path))
+            for name, path in getattr(settings, 'MULTINAV_PROVIDERS', {}).items())
+        self.build = tuple(getattr(settings, 'MULTINAV_PREBUILD', ()))
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Mark the instance as a coroutine function, as Django's
+            # MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request.navigations = get_navigations(request, self.providers, self.build)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.navigations = await aget_navigations(request, self.providers, self.build)
+        return await self.get_response(request)
@@ -0,0 +1,524 @@
+from django.utils.functional import cached_property
+
+from .compiled import EMPTY_ACTIVE_PATH, ActivePath, get_compiled_navigation
+from .nodes import CLOSE, EMPTY_CHILDREN, NODE, OPEN, TreeEvent, TreeNode, flatten
+from .registry import registry
+from .resolvers import cached_resolve, cached_reverse, get_reverse_key
+from .stats import build_timer, count
+from .trie import RequestPath
+from .utils import (get_fingerprint, get_kwargs_spec, match_subset_kwargs,
+        parse_url_name_args, resolve_kwargs)
+from .visibility import Visibility, get_by_permissions_key, get_permissions_key
+
+# The trees used to be built of TNodes, kept as an alias
+TNode = TreeNode
+
+
+def build_tnode(n, children, url, active):
+    """ Takes a multinavigation.conf.Node namedtuple and builds its TreeNode """
+    return TreeNode(n, url, active, children or EMPTY_CHILDREN)
+
+
+class Navigation(object):
+    """
+    The navigation state of one request for a list of nodes. The URL is
+    resolved only once and the tree is built only the first time it's needed,
+    so all the template tags rendering the same nodes on a page share the
+    work (see get_navigation).
+
+    shared is an OrderedDict to keep the tree nodes of the inactive static
+    subtrees in (by permissions key, with the version of the subtree they
+    were built for), to be reused by the next requests (see
+    multinavigation.registry.RegisteredNavigation.get_shared_subtrees). It
+    must only be shared by requests for the same nodes. Only the most
+    recently used permissions keys are kept (see
+    multinavigation.visibility.get_by_permissions_key).
+
+    Nodes hidden from the user (see multinavigation.visibility) are left
+    out with their subtrees.
+    """
+
+    def __init__(self, request, nodes, url_match=None, compiled=None, shared=None,
+            visibility=None, labels=None, fingerprint=None):
+        self.request = request
+        self.nodes = nodes
+        self.shared = shared
+        # the labels of the nodes, translated in the active language
+        self.labels = labels
+        # results of the visibility predicates, by index
+        self._predicates = {}
+        self.url_match = get_url_match(request) if url_match is None else url_match
+        if compiled is not None:
+            self.compiled = compiled
+        if visibility is not None:
+            self.visibility = visibility
+        if fingerprint is not None:
+            self.fingerprint = fingerprint
+
+    @property
+    def is_resolved(self):
+        """ False if there's no named urlpattern matching the request """
+        return bool(self.url_match and self.url_match.url_name)
+
+    @cached_property
+    def compiled(self):
+        return get_compiled_navigation(self.nodes)
+
+    @cached_property
+    def visibility(self):
+        return Visibility(self.nodes, self.compiled)
+
+    @cached_property
+    def permissions_key(self):
+        """ What the permission checks depend on (see
+        multinavigation.visibility.get_permissions_key), only looked up if
+        any node needs permissions """
+        if not self.visibility.has_permissions:
+            return None
+        return get_permissions_key(getattr(self.request, 'user', None))
+
+    def is_visible(self, index):
+        """ True if the node at index is shown to the user """
+        spec = self.visibility.specs[index]
+        if spec is None:
+            return True
+        if spec.permissions and not self.visibility.is_allowed(index, self.permissions_key):
+            return False
+        if spec.predicate is not None:
+            if index not in self._predicates:
+                self._predicates[index] = bool(spec.predicate(self.request, self.nodes[index]))
+            return self._predicates[index]
+        return True
+
+    @cached_property
+    def visibility_key(self):
+        """ Everything the visibility of the nodes depends on for the request
+        (to be part of cache keys) """
+        if not self.visibility:
+            return None
+        hidden = tuple(i for i in self.visibility.predicates if not self.is_visible(i))
+        permissions_key = self.permissions_key
+        if isinstance(permissions_key, frozenset):
+            permissions_key = sorted(permissions_key)
+        return permissions_key, hidden
+
+    @cached_property
+    def shared_subtrees(self):
+        if self.shared is None:
+            return None
+        return get_by_permissions_key(self.shared, self.permissions_key)
+
+    @cached_property
+    def fingerprint(self):
+        """ A digest of the nodes (see multinavigation.utils.get_fingerprint) """
+        return get_fingerprint(self.nodes)
+
+    @cached_property
+    def static_urls(self):
+        return self.compiled.get_static_urls()
+
+    @cached_property
+    def request_path(self):
+        if not hasattr(self.request, 'path'):
+            return None
+        return RequestPath(self.request.path)
+
+    @cached_property
+    def static_active(self):
+        """ The indexes of the active static nodes """
+        if self.request_path is None:
+            return frozenset()
+        return self.compiled.get_active_indexes(self.request_path.path)
+
+    def is_active(self, index, url):
+        """ Same as is_active(request, url) for the node at index, looked up
+        in the active indexes """
+        return index in self.active_indexes
+
+    @cached_property
+    def active_branch(self):
+        """ The indexes of the active static nodes and all their ancestors """
+        branch = set()
+        stack = list(self.static_active)
+        while stack:
+            i = stack.pop()
+            if i not in branch:
+                branch.add(i)
+                stack.extend(self.compiled.get_parents(i, self.url_match))
+        return branch
+
+    def add_nodes(self, indexes):
+        """ Builds the tree nodes for the nodes at the given indexes (and all
+        their descendants) by walking the compiled children index. """
+        tn_list = []
+        shared = self.shared_subtrees
+        built = 0
+        for i in indexes:
+            if not self.is_visible(i):
+                continue
+            if (shared is not None and self.compiled.static_subtree[i]
+                    and i not in self.active_branch and i not in self.visibility.volatile):
+                # nothing on this subtree depends on the request, besides
+                # the permissions
+                version = self.compiled.versions[i]
+                cached = shared.get(i)
+                if cached is None or cached[0] != version:
+                    built += 1
+                    cached = shared[i] = (version, self.add_node(i))
+                tnode = cached[1]
+            else:
+                built += 1
+                tnode = self.add_node(i)
+            if tnode is not None:
+                tn_list.append(tnode)
+        # counted once per level, the lookup of the stats isn't free
+        if built:
+            count('nodes', built)
+        return tn_list
+
+    def add_node(self, index):
+        """ Builds the tree node for the node at index, or returns None if it
+        has no valid URL (see add_nodes, which counts it) """
+        # children nodes can specify a parent by url_name and additionally
+        # with kwargs like this: 'the_url_name|kwd_1:val1,kwd_2:val2'
+        url, children = self.compiled.resolve_node(index, self.url_match, self.static_urls)
+        # Only add the node if it also has a valid URL, else it wouldn't
+        # make sense to add it in the menu
+        if not url:
+            return None
+        tn_children = self.add_nodes(children) if children else EMPTY_CHILDREN
+        return self.make_tnode(index, url, self.is_active(index, url), tn_children)
+
+    def make_tnode(self, index, url, active, children=EMPTY_CHILDREN):
+        label = self.labels[index] if self.labels is not None else None
+        return TreeNode(self.nodes[index], url, active, children, label)
+
+    @cached_property
+    @build_timer
+    def tree(self):
+        """ The tree nodes for the complete navigation """
+        if not self.is_resolved:
+            return []
+        return self.add_nodes(self.compiled.roots)
+
+    def iter_tree(self):
+        """ Yields the TreeEvents of a depth-first walk over the complete
+        navigation. Unless the tree is already built, nodes are built as
+        they're yielded, so the tree is never kept in memory. """
+        if not self.is_resolved:
+            return
+        if 'tree' in self.__dict__:
+            yield from iter_tree_nodes(self.tree)
+            return
+        yield from self._iter_nodes(self.compiled.roots, 0)
+
+    def _iter_nodes(self, indexes, depth):
+        opened = False
+        built = 0
+        try:
+            for i in indexes:
+                if not self.is_visible(i):
+                    continue
+                built += 1
+                url, children = self.compiled.resolve_node(i, self.url_match, self.static_urls)
+                if not url:
+                    continue
+                if not opened:
+                    opened = True
+                    yield TreeEvent(OPEN, None, depth)
+                yield TreeEvent(NODE, self.make_tnode(i, url, self.is_active(i, url)), depth)
+                if children:
+                    yield from self._iter_nodes(children, depth + 1)
+            if opened:
+                yield TreeEvent(CLOSE, None, depth)
+        finally:
+            # counted once per level, also if the walk is stopped
+            if built:
+                count('nodes', built)
+
+    @cached_property
+    @build_timer
+    def flattened(self):
+        """ The complete navigation as one list of FlatNodes, in depth-first
+        order (see multinavigation.nodes.FlatNode) """
+        return flatten(self.iter_tree())
+
+    @cached_property
+    @build_timer
+    def flat(self):
+        """ The tree nodes for the root level only (without children) """
+        if not self.is_resolved:
+            return []
+        count('nodes', len(self.compiled.roots))
+        tree_nodes = []
+        for i in self.compiled.roots:
+            if not self.is_visible(i):
+                continue
+            url, _ = self.compiled.resolve_node(i, self.url_match, self.static_urls)
+            tree_nodes.append(self.make_tnode(i, url, self.is_active(i, url)))
+        return tree_nodes
+
+    @cached_property
+    def active_root(self):
+        """ The first active root tree node, or None """
+        for n in self.tree:
+            if n.active:
+                return n
+        return None
+
+    @cached_property
+    def active_root_index(self):
+        """ The index of the first active root with a valid URL, or None """
+        if not self.is_resolved:
+            return None
+        active = self.active_indexes
+        for i in self.compiled.roots:
+            if i in active and self.is_visible(i):
+                return i
+        return None
+
+    @cached_property
+    @build_timer
+    def subnavigation(self):
+        """ The children of the active root. Only the subtree of the active
+        root is built, unless the complete tree has already been built. """
+        if 'tree' in self.__dict__:
+            return list(self.active_root.children) if self.active_root else []
+        if self.active_root_index is None:
+            return []
+        _, children = self.compiled.resolve_node(self.active_root_index,
+                self.url_match, self.static_urls)
+        return self.add_nodes(children)
+
+    def get_url(self, index):
+        """ The URL of the node at index ('' if it can't be reversed) """
+        url = self.static_urls[index]
+        if url is None:
+            url = cached_reverse(self.compiled.structure[index][0],
+                    self.compiled.resolve_kwargs(index, self.url_match))
+        return url
+
+    @cached_property
+    def active_path(self):
+        """ The ActivePath of the request (see
+        multinavigation.compiled.ActivePath). It's memoized on the compiled
+        navigation by the reverse key, the url_name and kwargs of the request
+        and its path, so the next requests for the same page skip finding
+        the active nodes. """
+        if self.request_path is None or not self.is_resolved:
+            return EMPTY_ACTIVE_PATH
+        try:
+            key = (get_reverse_key(), self.url_match.url_name,
+                    frozenset(self.url_match.kwargs.items()), self.request_path.path)
+            active_path = self.compiled.get_active_path(key)
+        except TypeError:
+            # unhashable kwargs, skip the memo
+            key = active_path = None
+        if active_path is not None:
+            count('active_hits')
+            return active_path
+        count('active_misses')
+        active_path = self.find_active_path()
+        if key is not None:
+            self.compiled.set_active_path(key, active_path)
+        return active_path
+
+    def find_active_path(self):
+        """ Finds the ActivePath of the request without building the tree:
+        the active static nodes through the compiled trie, the nodes with
+        placeholders by resolving only those. Then it climbs the parents of
+        the active nodes up to the roots. """
+        active = set(i for i in self.static_active if self.static_urls[i])
+        for i in self.compiled.dynamic:
+            url = self.get_url(i)
+            if url and self.request_path.is_active(url):
+                active.add(i)
+        active = frozenset(active)
+        # All the nodes on a branch leading to an active node, with their
+        # parents
+        parents = {}
+        stack = list(active)
+        while stack:
+            i = stack.pop()
+            if i in parents or not self.get_url(i):
+                continue
+            parents[i] = self.compiled.get_parents(i, self.url_match)
+            stack.extend(parents[i])
+        root = next((i for i in self.compiled.roots if i in active), None)
+        breadcrumbs = () if root is None else tuple(get_breadcrumbs(root, active, parents))
+        return ActivePath(active, parents, breadcrumbs)
+
+    @property
+    def active_indexes(self):
+        """ The indexes of all the active nodes with a valid URL """
+        return self.active_path.active
+
+    @cached_property
+    @build_timer
+    def breadcrumbs(self):
+        """
+        All the active nodes under the active root, top-down. Instead of
+        building the tree, we only walk down the branches of the active
+        nodes (see active_path), so the cost depends on the depth of the
+        active branch. The crumbs are built without children.
+        """
+        if self.active_root_index is None:
+            return []
+        active_path = self.active_path
+        if self.visibility:
+            indexes = get_breadcrumbs(self.active_root_index, active_path.active,
+                    active_path.parents, self.is_visible)
+        else:
+            indexes = active_path.breadcrumbs
+        return [self.make_tnode(i, self.get_url(i), True) for i in indexes]
+
+
+def get_breadcrumbs(index, active, parents, is_visible=None):
+    """ Yields the indexes of the active nodes from the node at index down,
+    given the parents of the nodes on the active branches. Children for
+    which is_visible is False are skipped with their subtrees. """
+    if index in active:
+        yield index
+    for c in sorted(parents):
+        if index in parents[c] and (is_visible is None or is_visible(c)):
+            yield from get_breadcrumbs(c, active, parents, is_visible)
+
+
+def iter_tree_nodes(tree_nodes, depth=0):
+    """ Yields the TreeEvents of a depth-first walk over built tree nodes """
+    if not tree_nodes:
+        return
+    yield TreeEvent(OPEN, None, depth)
+    for tnode in tree_nodes:
+        yield TreeEvent(NODE, tnode, depth)
+        yield from iter_tree_nodes(tnode.children, depth + 1)
+    yield TreeEvent(CLOSE, None, depth)
+
+
+def get_request_memo(request):
+    """ Returns the dict the navigations of a request are memoized in """
+    memo = getattr(request, '_multinavigation', None)
+    if memo is None:
+        memo = {}
+        try:
+            request._multinavigation = memo
+        except AttributeError:
+            pass
+    return memo
+
+
+def make_navigation(request, nodes, url_match=None):
+    """ Returns a new Navigation for the request and nodes, which can also be
+    the name of a registered navigation (see multinavigation.registry) """
+    if not isinstance(nodes, str):
+        return Navigation(request, nodes, url_match)
+    registered = registry.get(nodes)
+    # read once, the updates replace it
+    snapshot = registered.snapshot
+    return Navigation(request, snapshot.nodes, url_match, compiled=snapshot.compiled,
+            shared=registered.get_shared_subtrees(), visibility=snapshot.visibility,
+            labels=snapshot.get_labels(), fingerprint=snapshot.get_fingerprint())
+
+
+@build_timer
+def get_navigation(request, nodes):
+    """ Returns the Navigation for the request and nodes, memoized on the
+    request, so it's only built once per page. nodes can also be the name of
+    a registered navigation (see multinavigation.registry) or of one built
+    ahead for the request (see multinavigation.asynchronous). """
+    memo = get_request_memo(request)
+    if isinstance(nodes, str):
+        if nodes in memo:
+            return memo[nodes]
+        key = registry.get(nodes).nodes
+    else:
+        key = nodes
+    navigation = memo.get(id(key))
+    # Check the identity too: ids can be reused after the nodes are discarded
+    if navigation is None or navigation.nodes is not key:
+        navigation = memo[id(key)] = make_navigation(request, nodes)
+    return navigation
+
+
+def get_root(n, nodes, url_match):
+    """ returns the top-most parent in nodes for the given node """
+    parent = find_parent(n, nodes, url_match)
+    if not parent:
+        return n
+    if not parent.parent:
+        return parent
+    else:
+        return get_root(parent, nodes, url_match)
+
+
+def find_parent(child, nodes, url_match):
+    if not child.parent:
+        return None
+    url_name, kwargs = parse_url_name_args(child.parent)
+    for node in nodes:
+        if match_node(url_name, kwargs, node, url_match):
+            return node
+    return None
+
+
+def get_url_match(request):
+    """ Get the name of the matching urlpattern: the request's resolver_match
+    if Django resolved the same path already, else the cached result of
+    resolving the path (see multinavigation.resolvers.cached_resolve) """
+    if not hasattr(request, 'path'):
+        return ""
+    url_match = getattr(request, 'resolver_match', None)
+    # the handler resolves path_info, which only differs with a script prefix
+    if url_match is not None and getattr(request, 'path_info', None) == request.path:
+        count('resolve_reused')
+        return url_match
+    return cached_resolve(request.path)
+
+
+# TODO: make it work with only node context or url|<kwargs>, or a combination
+#   of both, without having to repeat same kwargs on url|<kwargs> and {'url_kwargs'...}
+def match_node(url_name, kwargs, node, url_match):
+    """ Returns true if a node matches url_name and kwargs (if any given) """
+    if node.url_name != url_name:
+        return False
+
+    # Check if the kwargs set on the node match the ones from the request
+    nkwargs = resolve_kwargs(get_kwargs_spec(node), url_match)
+    if not kwargs and not nkwargs:
+        return True
+
+    return match_subset_kwargs(kwargs, nkwargs)
+
+
+def add_nodes(compiled, nodes, indexes, request, url_match):
+    """ Builds the tree nodes for the nodes at the given indexes (see
+    Navigation.add_nodes) """
+    navigation = Navigation(request, nodes, url_match)
+    navigation.compiled = compiled
+    return navigation.add_nodes(indexes)
+
+
+def reverse_url(n, url_match, kwargs_dict=None):
+    """ Returns the node's URL or '' if it can't be reversed (cached, see
+    multinavigation.resolvers.cached_reverse) """
+    # Get any passed kwargs from the node's context
+    if kwargs_dict is None:
+        kwargs_dict = resolve_kwargs(get_kwargs_spec(n), url_match)
+    return cached_reverse(n.url_name, kwargs_dict)
+
+
+def is_active(request, link_url):
+    """ check if the corresponding parts of the given link and the request.path
+    match (active).
+    For example, if request.path is '/bla/bli/blu/' and link_url is '/bla/',
+    '/bla/bli' or /bla/bli/blu/', then is_active should return True
+    """
+    if not hasattr(request, 'path'):
+        return False
+    link_parts = link_url.strip('/').split('/')
+    request_parts = (request.path).strip('/').split('/')
+    if len(request_parts) < len(link_parts):
+        return False
+    link_comp = '/'.join(link_parts)
+    req_comp = '/'.join(request_parts[0:len(link_parts)])
+    return link_comp == req_comp
@@ -0,0 +1,186 @@
+"""
+Compact node classes.
+
+FrozenNode is an immutable multinavigation.conf.Node for the navigations
+kept for the lifetime of the process (see multinavigation.registry): the
+url_names are interned and equal contexts are shared as one read-only
+mapping.
+
+TreeNode is what the templates render. It only holds what depends on the
+request (the URL, the active flag and the children) and takes the label and
+the context from the node it's built from, so it doesn't copy them.
+
+TreeEvent is what Navigation.iter_tree yields instead of building a tree,
+and FlatNode an item of a tree flattened in one list (see
+Navigation.flattened), to render it without recursion.
+"""
+from collections import namedtuple
+import sys
+from types import MappingProxyType
+
+from django.utils.functional import Promise
+
+# The children of the tree nodes without children, shared by all of them
+EMPTY_CHILDREN = ()
+
+EMPTY_CONTEXT = MappingProxyType({})
+
+
+class FrozenNode(object):
+    """ A multinavigation.conf.Node which can't be changed. It compares equal
+    to the Node with the same values and unpacks the same way. """
+    __slots__ = ('url_name', 'label', 'parent', 'context')
+
+    def __init__(self, url_name, label, parent, context=EMPTY_CONTEXT):
+        setter = super(FrozenNode, self).__setattr__
+        setter('url_name', sys.intern(url_name))
+        setter('label', label)
+        setter('parent', sys.intern(parent) if parent else '')
+        setter('context', context if isinstance(context, MappingProxyType)
+                else MappingProxyType(dict(context or {})))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is immutable'.format(type(self).__name__))
+
+    def __reduce__(self):
+        return (type(self), (self.url_name, self.label, self.parent, dict(self.context)))
+
+    def __iter__(self):
+        return iter((self.url_name, self.label, self.parent, self.context))
+
+    def __eq__(self, other):
+        if isinstance(other, (FrozenNode, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.url_name, self.parent))
+
+    def __repr__(self):
+        return 'FrozenNode(url_name={!r}, label={!r}, parent={!r}, context={!r})'.format(
+            self.url_name, self.label, self.parent, dict(self.context))
+
+
+def freeze_nodes(nodes):
+    """ Returns a tuple of FrozenNodes for a list of nodes. Nodes with equal
+    contexts share the same mapping. """
+    contexts = {}
+    frozen = []
+    for n in nodes:
+        context = n.context or EMPTY_CONTEXT
+        if not isinstance(context, MappingProxyType):
+            try:
+                key = tuple(sorted(context.items()))
+                hash(key)
+            except TypeError:
+                context = MappingProxyType(dict(context))
+            else:
+                if key not in contexts:
+                    contexts[key] = MappingProxyType(dict(context))
+                context = contexts[key]
+        frozen.append(FrozenNode(n.url_name, n.label, n.parent, context))
+    return tuple(frozen)
+
+
+def resolve_label(label):
+    """ Returns a lazy label translated in the active language, any other
+    label as it is """
+    return str(label) if isinstance(label, Promise) else label
+
+
+class TreeNode(object):
+    """ A node on a tree-navigation: the url, active flag and children for
+    one request over the node it's built from. resolved_label is the node's
+    label already translated, if available. """
+    __slots__ = ('node', 'url', 'active', 'children', 'resolved_label')
+
+    def __init__(self, node, url, active, children=EMPTY_CHILDREN, resolved_label=None):
+        self.node = node
+        self.url = url
+        self.active = active
+        self.children = children
+        self.resolved_label = resolved_label
+
+    @property
+    def label(self):
+        if self.resolved_label is not None:
+            return self.resolved_label
+        return self.node.label
+
+    @property
+    def context(self):
+        return self.node.context
+
+    def __eq__(self, other):
+        if not isinstance(other, TreeNode):
+            return NotImplemented
+        return (self.url, self.label, self.active, self.context, list(self.children)) == \
+            (other.url, other.label, other.active, other.context, list(other.children))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'TreeNode(url={!r}, label={!r}, active={!r}, children={!r})'.format(
+            self.url, self.label, self.active, self.children)
+
+
+OPEN, NODE, CLOSE = 'open', 'node', 'close'
+
+""" An event of a depth-first walk over a tree-navigation: OPEN before the
+first node of a level, NODE for each node (a TreeNode, whose children follow
+as events, don't rely on its children attribute) and CLOSE after the last
+node of a level """
+TreeEvent = namedtuple('TreeEvent', 'kind node depth')
+
+
+class FlatNode(object):
+    """
+    A node of a tree-navigation flattened in depth-first order, with the
+    markers to render the tree in one loop:
+
+    opens       -- True if it's the first node of a nested level
+    has_children -- True if the next node is its first child
+    closes      -- the number of nested levels ending after it (or its
+                   children)
+
+    The rest of its attributes are the ones of its TreeNode.
+    """
+    __slots__ = ('tnode', 'depth', 'opens', 'has_children', 'closes')
+
+    def __init__(self, tnode, depth, opens=False):
+        self.tnode = tnode
+        self.depth = depth
+        self.opens = opens
+        self.has_children = False
+        self.closes = 0
+
+    url = property(lambda self: self.tnode.url)
+    label = property(lambda self: self.tnode.label)
+    active = property(lambda self: self.tnode.active)
+    context = property(lambda self: self.tnode.context)
+
+    @property
+    def close_levels(self):
+        """ To loop over the levels ending after it in templates """
+        return range(self.closes)
+
+    def __repr__(self):
+        return 'FlatNode(label={!r}, depth={!r}, opens={!r}, has_children={!r}, closes={!r})'.format(
+            self.label, self.depth, self.opens, self.has_children, self.closes)
+
+
+def flatten(events):
+    """ Returns the list of FlatNodes for the TreeEvents of a tree """
+    flat = []
+    opens = False
+    for kind, tnode, depth in events:
+        if kind == NODE:
+            flat.append(FlatNode(tnode, depth, opens))
+            opens = False
+        elif depth > 0:
+            if kind == OPEN:
+                flat[-1].has_children = True
+                opens = True
+            else:
+                flat[-1].closes += 1
+    return flat
@@ -0,0 +1,177 @@
+"""
+Navigations loaded from the database.
+
+ModelNodesProvider builds the nodes of a navigation from the rows of a
+model, e.g. menu entries managed by editors:
+
+    # mysite/navigation.py
+    from multinavigation.providers import ModelNodesProvider
+
+    menu_nodes = ModelNodesProvider(MenuEntry, context_fields=['css_class'])
+
+It's a provider (see multinavigation.asynchronous), so it can be listed in
+MULTINAV_PROVIDERS or called with the request, e.g. in a context processor.
+
+The nodes are loaded with one query and kept in the process and in the
+Django cache, along with a version number kept in the Django cache too. The
+version is bumped on post_save and post_delete of the model, so every
+process loads the nodes again (from the Django cache, only the first one
+queries the database) once they change. Changes which don't send these
+signals (e.g. QuerySet.update) need a call to invalidate(). The version is
+shared by the providers of a model, the rows by the providers with the same
+query, fields and context_fields (or the same name).
+"""
+import hashlib
+import threading
+import time
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import cached_property
+
+from .conf import Node
+from .nodes import freeze_nodes
+
+KEY_PREFIX = 'multinavigation:provider'
+
+
+class ModelNodesProvider(object):
+    """
+    Provides the nodes of a navigation from the rows of model (or of
+    queryset, in its order). The values of the nodes are read from the
+    fields named by url_name, label and url_kwargs (which may be None), and
+    from parent: either a char field with the parent spec
+    ('url_name|k:v,...') or a foreign key to the same model, in which case
+    the spec is built from the parent row's url_name and fixed url_kwargs.
+    The values of context_fields are added to the context of each node.
+    The rows are kept in the Django cache for timeout seconds (the cache's
+    default timeout if not given), under a key built from the query and the
+    fields, or from name if given.
+    """
+
+    def __init__(self, model, url_name='url_name', label='label', parent='parent',
+            url_kwargs='url_kwargs', context_fields=(), queryset=None,
+            cache_alias=DEFAULT_CACHE_ALIAS, timeout=DEFAULT_TIMEOUT, name=None):
+        self.model = model
+        self.name = name
+        self.queryset = queryset
+        self.url_name_field = url_name
+        self.label_field = label
+        self.parent_field = parent
+        self.url_kwargs_field = url_kwargs
+        self.context_fields = tuple(context_fields)
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        # the key of the version, shared by the providers of the model
+        self.key = '{}:{}'.format(KEY_PREFIX, model._meta.label_lower)
+        # (version, nodes) of this process
+        self._loaded = (None, None)
+        self._lock = threading.Lock()
+        # one receiver for all the providers sharing the version
+        dispatch_uid = '{}:{}'.format(self.key, cache_alias)
+        post_save.connect(self.invalidate, sender=model, weak=False, dispatch_uid=dispatch_uid)
+        post_delete.connect(self.invalidate, sender=model, weak=False, dispatch_uid=dispatch_uid)
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def __call__(self, request=None):
+        return self.get_nodes()
+
+    def get_version(self):
+        """ Returns the current version of the nodes (from the Django cache) """
+        version = self.cache.get(self.key)
+        if version is None:
+            # Start from the time, not from 1, so a version evicted from the
+            # cache isn't reused for different nodes
+            self.cache.add(self.key, int(time.time() * 1000), None)
+            version = self.cache.get(self.key)
+        return version
+
+    def invalidate(self, **kwargs):
+        """ Bumps the version, so every process loads the nodes again """
+        try:
+            self.cache.incr(self.key)
+        except ValueError:
+            self.get_version()
+
+    def get_nodes(self):
+        """ Returns the nodes as a tuple of FrozenNodes. The tuple is the
+        same one until the version changes, so its compiled navigation is
+        reused too. """
+        version = self.get_version()
+        loaded_version, nodes = self._loaded
+        if version == loaded_version and version is not None:
+            return nodes
+        with self._lock:
+            loaded_version, nodes = self._loaded
+            if version != loaded_version or version is None:
+                key = self.get_rows_key(version)
+                rows = self.cache.get(key)
+                if rows is None:
+                    rows = self.load()
+                    self.cache.set(key, rows, self.timeout)
+                    if loaded_version is not None:
+                        # the rows of the previous version aren't needed
+                        # anymore
+                        self.cache.delete(self.get_rows_key(loaded_version))
+                nodes = freeze_nodes(rows)
+                self._loaded = (version, nodes)
+        return nodes
+
+    @cached_property
+    def rows_key(self):
+        """ The key of the rows without the version: the name, else a digest
+        of what the rows depend on (the query, built lazily as it needs the
+        database connection) """
+        if self.name is not None:
+            return '{}:{}'.format(self.key, self.name)
+        identity = repr((str(self.get_queryset().query), self.url_name_field, self.label_field,
+                self.parent_field, self.url_kwargs_field, self.context_fields))
+        return '{}:{}'.format(self.key, hashlib.md5(identity.encode()).hexdigest())
+
+    def get_rows_key(self, version):
+        return '{}:{}'.format(self.rows_key, version)
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset.all()
+        return self.model._default_manager.all()
+
+    def load(self):
+        """ Queries the nodes, returns a list of multinavigation.conf.Node """
+        parent_field = self.model._meta.get_field(self.parent_field)
+        parent = parent_field.attname
+        fields = [self.url_name_field, self.label_field, parent]
+        if self.url_kwargs_field:
+            fields.append(self.url_kwargs_field)
+        fields.extend(self.context_fields)
+        if parent_field.is_relation:
+            fields.append('pk')
+        rows = list(self.get_queryset().values(*fields))
+
+        if parent_field.is_relation:
+            # the parent spec of the children of each row
+            specs = {}
+            for row in rows:
+                url_kwargs = row.get(self.url_kwargs_field) or ''
+                fixed = ','.join(pair for pair in url_kwargs.split(',')
+                        if pair and not pair.endswith(':'))
+                url_name = row[self.url_name_field]
+                specs[row['pk']] = '{}|{}'.format(url_name, fixed) if fixed else url_name
+        nodes = []
+        for row in rows:
+            parent_spec = row[parent] or ''
+            if parent_field.is_relation and row[parent] is not None:
+                if row[parent] not in specs:
+                    # the parent isn't in the queryset
+                    continue
+                parent_spec = specs[row[parent]]
+            context = dict((name, row[name]) for name in self.context_fields)
+            if row.get(self.url_kwargs_field):
+                context['url_kwargs'] = row[self.url_kwargs_field]
+            nodes.append(Node(row[self.url_name_field], row[self.label_field],
+                    parent_spec, context))
+        return nodes
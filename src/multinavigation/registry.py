@@ -0,0 +1,265 @@
+import logging
+from collections import OrderedDict
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from django.utils.translation import get_language, override
+
+from . import resolvers
+from .compiled import get_compiled_navigation, get_structure, load_compiled
+from .nodes import FrozenNode, freeze_nodes, resolve_label
+from .resolvers import get_reverse_key
+from .utils import get_fingerprint
+from .visibility import Visibility
+
+logger = logging.getLogger(__name__)
+
+
+class AlreadyRegistered(Exception):
+    pass
+
+
+class NotRegistered(KeyError):
+    pass
+
+
+class NavigationSnapshot(object):
+    """ The nodes of a registered navigation and what's built from them: the
+    compiled navigation, the Visibility and the labels and fingerprints by
+    language. A snapshot isn't changed once requests use it, updates
+    replace it with a new one (see RegisteredNavigation). """
+
+    def __init__(self, nodes, compiled=None):
+        self.nodes = nodes
+        if compiled is not None:
+            self.compiled = compiled
+        # language -> labels, language -> fingerprint
+        self._labels = {}
+        self._fingerprints = {}
+
+    @cached_property
+    def compiled(self):
+        return get_compiled_navigation(self.nodes)
+
+    @cached_property
+    def visibility(self):
+        return Visibility(self.nodes, self.compiled)
+
+    def get_labels(self):
+        """ Returns the labels of the nodes translated in the active language
+        (built the first time it's active) """
+        language = get_language()
+        labels = self._labels.get(language)
+        if labels is None:
+            labels = self._labels[language] = tuple(
+                None if n is None else resolve_label(n.label) for n in self.nodes)
+        return labels
+
+    def get_fingerprint(self):
+        """ Returns the fingerprint of the nodes in the active language (see
+        multinavigation.utils.get_fingerprint) """
+        language = get_language()
+        fingerprint = self._fingerprints.get(language)
+        if fingerprint is None:
+            fingerprint = self._fingerprints[language] = get_fingerprint(self.nodes)
+        return fingerprint
+
+
+class RegisteredNavigation(object):
+    """ A named list of nodes, loaded once and kept for the lifetime of the
+    process, so its compiled navigation can be kept along with it. The
+    nodes are kept as FrozenNodes (see multinavigation.nodes).
+
+    The nodes and what's built from them are kept in a NavigationSnapshot.
+    The updates (add_node, ...) patch a copy of the compiled navigation and
+    replace the snapshot at once, so the requests being built keep the one
+    they started with (read snapshot once). """
+
+    def __init__(self, name, nodes):
+        self.name = name
+        self.snapshot = NavigationSnapshot(freeze_nodes(nodes))
+        self._shared_subtrees = {}
+        self._shared_subtrees_generation = resolvers.generation
+        self._update_lock = threading.Lock()
+
+    @property
+    def nodes(self):
+        return self.snapshot.nodes
+
+    @property
+    def compiled(self):
+        return self.snapshot.compiled
+
+    @property
+    def visibility(self):
+        return self.snapshot.visibility
+
+    def get_labels(self):
+        return self.snapshot.get_labels()
+
+    def get_fingerprint(self):
+        return self.snapshot.get_fingerprint()
+
+    def _update(self, update, index=None, node=None):
+        """ Replaces the snapshot with one where update(compiled) was applied
+        to a copy of the compiled navigation (which may be shared with other
+        navigations or used by requests) and the node at index is replaced
+        by node, or node is added if index is None. Returns what update
+        returned. """
+        with self._update_lock:
+            snapshot = self.snapshot
+            compiled = snapshot.compiled.copy()
+            result = update(compiled)
+            nodes = snapshot.nodes
+            if index is None:
+                nodes += (node,)
+            else:
+                nodes = nodes[:index] + (node,) + nodes[index + 1:]
+            self.snapshot = NavigationSnapshot(nodes, compiled)
+        return result
+
+    def add_node(self, node):
+        """ Adds a node at the end and returns its index. Only the parts of
+        the compiled navigation (and the shared subtrees) which depend on it
+        are updated. """
+        node = freeze_nodes([node])[0]
+        entry = get_structure([node])[0]
+        return self._update(lambda compiled: compiled.add(entry), node=node)
+
+    def remove_node(self, index):
+        """ Removes the node at index. Its index is left as None, so the
+        indexes of the other nodes don't change. """
+        self._update(lambda compiled: compiled.remove(index), index, None)
+
+    def move_node(self, index, parent):
+        """ Sets the parent (spec) of the node at index """
+        node = self.nodes[index]
+        self._update(lambda compiled: compiled.move(index, parent), index,
+                FrozenNode(node.url_name, node.label, parent, node.context))
+
+    def relabel_node(self, index, label):
+        """ Sets the label of the node at index """
+        node = self.nodes[index]
+        self._update(lambda compiled: compiled.touch(index), index,
+                FrozenNode(node.url_name, label, node.parent, node.context))
+
+    def get_shared_subtrees(self):
+        """ Returns the OrderedDict of permissions keys and dicts of node
+        indexes and the tree nodes built for their inactive static subtrees,
+        shared by all the requests with the same urlconf, script prefix and
+        language (see multinavigation.navigation.Navigation). """
+        if self._shared_subtrees_generation != resolvers.generation:
+            self._shared_subtrees = {}
+            self._shared_subtrees_generation = resolvers.generation
+        reverse_key = get_reverse_key()
+        shared = self._shared_subtrees.get(reverse_key)
+        if shared is None:
+            shared = self._shared_subtrees.setdefault(reverse_key, OrderedDict())
+        return shared
+
+
+class NavigationRegistry(object):
+    """
+    Navigations registered by name, so the template tags can take the name
+    instead of a list of nodes built on every request, e.g.
+
+        {% tabnavigation request "main" %}
+
+    Navigations are registered from python with register, or listed in the
+    MULTINAV_NAVIGATIONS setting as a dict of names and dotted paths to
+    either a list of nodes or a callable returning one:
+
+        MULTINAV_NAVIGATIONS = {'main': 'mysite.navigation.MAIN_NODES'}
+
+    If MULTINAV_COMPILED_PATH points to a file written by the multinav_compile
+    management command, the compiled navigations are loaded from it instead
+    of being compiled again (as long as the nodes haven't changed since).
+
+    Since the nodes are built only once, labels to be translated should be
+    lazy (gettext_lazy).
+    """
+
+    def __init__(self):
+        self._navigations = {}
+        # seconds the last warm_up took
+        self.warmup_time = None
+
+    def register(self, name, nodes):
+        if name in self._navigations:
+            raise AlreadyRegistered('The navigation {!r} is already registered'.format(name))
+        self._navigations[name] = RegisteredNavigation(name, nodes)
+        return self._navigations[name]
+
+    def unregister(self, name):
+        if name not in self._navigations:
+            raise NotRegistered('The navigation {!r} is not registered'.format(name))
+        del self._navigations[name]
+
+    def get(self, name):
+        try:
+            return self._navigations[name]
+        except KeyError:
+            raise NotRegistered('The navigation {!r} is not registered'.format(name))
+
+    def __contains__(self, name):
+        return name in self._navigations
+
+    def __iter__(self):
+        return iter(self._navigations.values())
+
+    def load_from_settings(self):
+        """ Registers the navigations listed in MULTINAV_NAVIGATIONS """
+        for name, path in getattr(settings, 'MULTINAV_NAVIGATIONS', {}).items():
+            nodes = import_string(path)
+            if callable(nodes):
+                nodes = nodes()
+            self.register(name, nodes)
+        path = getattr(settings, 'MULTINAV_COMPILED_PATH', None)
+        if path and os.path.exists(path):
+            self.load_compiled(path)
+
+    def load_compiled(self, path):
+        """ Uses the compiled navigations from the file at path for the
+        registered navigations with the same structure """
+        for name, compiled in load_compiled(path).items():
+            registered = self._navigations.get(name)
+            if registered is not None and compiled.structure == get_structure(registered.nodes):
+                registered.snapshot = NavigationSnapshot(registered.nodes, compiled)
+
+    def warm_up(self):
+        """
+        Compiles all the registered navigations, reverses their static URLs
+        (which also loads the urlconf) and translates their labels, for
+        every language in LANGUAGES if it's set, else for LANGUAGE_CODE.
+        With MULTINAV_WARMUP = True this runs when the app is loaded, so
+        with a pre-fork server the workers share this state instead of
+        building it on their first request. Returns the time it took in
+        seconds.
+        """
+        start = time.perf_counter()
+        languages = get_warmup_languages()
+        for language in languages:
+            with override(language):
+                for registered in self:
+                    registered.compiled.get_static_urls()
+                    registered.get_labels()
+                    registered.get_fingerprint()
+        nodes = sum(len(registered.compiled) for registered in self)
+        self.warmup_time = time.perf_counter() - start
+        logger.info('Warmed up %d navigation(s) with %d nodes for %d language(s) in %.1f ms',
+                len(self._navigations), nodes, len(languages), self.warmup_time * 1000)
+        return self.warmup_time
+
+
+def get_warmup_languages():
+    """ The languages the navigations are used in, as far as we can tell """
+    if settings.USE_I18N and settings.is_overridden('LANGUAGES'):
+        return [code for code, _ in settings.LANGUAGES]
+    return [settings.LANGUAGE_CODE]
+
+
+registry = NavigationRegistry()
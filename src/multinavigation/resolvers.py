@@ -0,0 +1,121 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import (NoReverseMatch, Resolver404, get_script_prefix, get_urlconf,
+        resolve, reverse, set_script_prefix)
+from django.utils.translation import get_language, override
+
+from .stats import count
+
+# Max. number of reversed URLs kept in memory
+REVERSE_CACHE_SIZE = 4096
+
+# Max. number of resolved paths kept in memory
+RESOLVE_CACHE_SIZE = 256
+
+# Bumped by clear_caches, so URLs cached elsewhere (e.g. the static URLs of a
+# compiled navigation) can tell they're outdated
+generation = 0
+
+
+def get_current_urlconf():
+    """ Returns the urlconf reverse() and resolve() use now: the one set for
+    the current request (Django's handler sets the ROOT_URLCONF too), else
+    the ROOT_URLCONF, so the keys are the same in and out of requests """
+    return get_urlconf(settings.ROOT_URLCONF)
+
+
+def get_reverse_key():
+    """ Returns the parts of the current state reverse() depends on: the
+    urlconf, the script prefix and the active language """
+    return (get_current_urlconf(), get_script_prefix(), get_language())
+
+
+def safe_reverse(url_name, kwargs, urlconf=None):
+    """ Returns the reversed URL or '' if it can't be reversed """
+    count('reverse_calls')
+    try:
+        return reverse(url_name, urlconf=urlconf, kwargs=kwargs)
+    except NoReverseMatch:
+        return ''
+
+
+def reverse_for_key(url_name, kwargs, key):
+    """ Same as safe_reverse, for the urlconf, script prefix and language of
+    a key returned by get_reverse_key instead of the current ones """
+    urlconf, script_prefix, language = key
+    current_prefix = get_script_prefix()
+    set_script_prefix(script_prefix)
+    try:
+        with override(language):
+            return safe_reverse(url_name, kwargs, urlconf)
+    finally:
+        set_script_prefix(current_prefix)
+
+
+@lru_cache(maxsize=REVERSE_CACHE_SIZE)
+def _reverse(url_name, kwargs, urlconf, script_prefix, language):
+    # script_prefix and language are only part of the cache key, reverse()
+    # picks them up by itself
+    # cached_reverse counted the lookup as a hit
+    count('reverse_hits', -1)
+    count('reverse_misses')
+    return safe_reverse(url_name, dict(kwargs), urlconf)
+
+
+def cached_reverse(url_name, kwargs):
+    """
+    Returns the reversed URL for url_name and kwargs, or '' if it can't be
+    reversed. Results (including failed ones) are memoized by url_name,
+    kwargs, the current urlconf, the script prefix and the active language.
+    """
+    count('reverse_hits')
+    try:
+        return _reverse(url_name, frozenset(kwargs.items()), *get_reverse_key())
+    except TypeError:
+        # unhashable kwargs, skip the cache
+        count('reverse_hits', -1)
+        return safe_reverse(url_name, kwargs)
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def _resolve(path, urlconf, language):
+    # language is only part of the cache key (i18n_patterns match the prefix
+    # of the active language)
+    count('resolve_hits', -1)
+    count('resolve_calls')
+    try:
+        return resolve(path, urlconf)
+    except Resolver404:
+        return None
+
+
+def cached_resolve(path):
+    """
+    Returns the ResolverMatch for path, or None if it can't be resolved.
+    Results are memoized by path, the current urlconf and the active
+    language. The ResolverMatches are shared, don't change them.
+    """
+    count('resolve_hits')
+    return _resolve(path, get_current_urlconf(), get_language())
+
+
+def reverse_cache_info():
+    """ Returns the hits, misses, maxsize and currsize of the reverse cache """
+    return _reverse.cache_info()
+
+
+def clear_caches():
+    """ Clears the cached URLs and resolved paths. Call it whenever the urlconfs are reloaded. """
+    global generation
+    generation += 1
+    _reverse.cache_clear()
+    _resolve.cache_clear()
+
+
+@receiver(setting_changed)
+def clear_caches_on_setting_changed(setting, **kwargs):
+    if setting in ('ROOT_URLCONF', 'LANGUAGE_CODE', 'LANGUAGES', 'USE_I18N'):
+        clear_caches()
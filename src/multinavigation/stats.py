@@ -0,0 +1,95 @@
+"""
+Per-request counters and timings of the navigation tags.
+
+They're only collected for the requests going through
+multinavigation.middleware.NavigationStatsMiddleware, which reports them
+when the response is ready: through the navigation_stats signal, the
+callable at the dotted path MULTINAV_STATS_CALLBACK (called with the
+request and the NavigationStats) and, if MULTINAV_STATS_HEADER is set, as a
+response header with that name. Without the middleware, collecting them
+costs a context variable lookup per instrumented call (the nodes are
+counted once per level of a tree, not one by one).
+"""
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from django.dispatch import Signal
+
+# Sent with request and stats (a NavigationStats) once the response is ready
+navigation_stats = Signal()
+
+# The stats of the current request (a context variable, so they're kept per
+# thread and per asyncio task)
+_stats = ContextVar('multinavigation_stats', default=None)
+
+
+class NavigationStats(object):
+    """ The counters and timings (in seconds) of one request """
+    __slots__ = (
+        'nodes',            # nodes added to trees
+        'resolve_calls',    # resolve() calls
+        'resolve_reused',   # request.resolver_match reused instead
+        'resolve_hits',     # cached resolve lookups
+        'reverse_calls',    # reverse() calls
+        'reverse_hits',     # cached reverse lookups
+        'reverse_misses',
+        'fragment_hits',    # fragment cache lookups (see multinavigation.cache)
+        'fragment_misses',
+        'active_hits',      # memoized active states (see Navigation.active_path)
+        'active_misses',
+        'build_time',
+        'render_time',
+        '_building',
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+        self.build_time = self.render_time = 0.0
+        self._building = False
+
+    def as_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__
+                if not name.startswith('_'))
+
+    def __str__(self):
+        return ' '.join(
+            '{}={:.3f}ms'.format(name, value * 1000) if isinstance(value, float)
+            else '{}={}'.format(name, value)
+            for name, value in self.as_dict().items())
+
+
+def get_stats():
+    """ Returns the NavigationStats being collected for the current request,
+    or None """
+    return _stats.get()
+
+
+def set_stats(stats):
+    _stats.set(stats)
+
+
+def count(name, n=1):
+    """ Adds n to the counter name of the current stats, if any """
+    stats = _stats.get()
+    if stats is not None:
+        setattr(stats, name, getattr(stats, name) + n)
+
+
+def build_timer(func):
+    """ Adds the time spent in func to the build_time of the current stats.
+    Nested calls are only timed once. """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = _stats.get()
+        if stats is None or stats._building:
+            return func(*args, **kwargs)
+        stats._building = True
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.build_time += perf_counter() - start
+            stats._building = False
+    return wrapper
@@ -0,0 +1,82 @@
+"""
+Rendering very large tab navigations in chunks.
+
+ChunkedRenderer writes the HTML of a tab navigation from the events of
+Navigation.iter_tree, which builds the nodes as they're rendered, so
+neither the tree nor the whole output are kept in memory:
+
+    def menu(request):
+        return StreamingHttpResponse(stream_navigation(request, 'main'))
+
+The markup is the one of the example simple_templates. Subclass
+ChunkedRenderer and override open_list, open_item, close_item and
+close_list to change it.
+"""
+from django.utils.html import format_html
+
+from .navigation import get_navigation
+from .nodes import CLOSE, NODE, OPEN
+
+
+class ChunkedRenderer(object):
+    """ Renders the events of Navigation.iter_tree in chunks of at least
+    chunk_size characters (but the last one) """
+    chunk_size = 8192
+
+    def __init__(self, chunk_size=None):
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+
+    def open_list(self, depth):
+        if depth == 0:
+            return '<ul id="tabnavigation">'
+        return '<ul class="dropdown">'
+
+    def open_item(self, node, depth):
+        css_class = ' '.join(c for c in (
+            'active' if node.active else '', node.context.get('css_class', '')) if c)
+        return format_html('<li><a href="{}" class="{}">{}</a>', node.url, css_class, node.label)
+
+    def close_item(self, depth):
+        return '</li>'
+
+    def close_list(self, depth):
+        return '</ul>'
+
+    def iter_html(self, events):
+        """ Yields the HTML for each event """
+        # the depths with an item not closed yet
+        open_items = set()
+        for kind, node, depth in events:
+            if kind == OPEN:
+                yield self.open_list(depth)
+            elif kind == NODE:
+                if depth in open_items:
+                    yield self.close_item(depth)
+                open_items.add(depth)
+                yield self.open_item(node, depth)
+            elif kind == CLOSE:
+                if depth in open_items:
+                    open_items.discard(depth)
+                    yield self.close_item(depth)
+                yield self.close_list(depth)
+
+    def render(self, navigation):
+        """ Yields the HTML of the navigation in chunks """
+        chunk = []
+        size = 0
+        for html in self.iter_html(navigation.iter_tree()):
+            chunk.append(html)
+            size += len(html)
+            if size >= self.chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+                size = 0
+        if chunk:
+            yield ''.join(chunk)
+
+
+def stream_navigation(request, nodes, renderer=None):
+    """ Returns a generator of the HTML chunks of the tab navigation for the
+    request and nodes (see get_navigation) """
+    return (renderer or ChunkedRenderer()).render(get_navigation(request, nodes))
@@ -0,0 +1,104 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission, User
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, modify_settings, override_settings
+
+from .asynchronous import aget_navigation, aget_navigations, get_navigations
+from .conf import Node
+from .navigation import get_navigation
+from src.test_app.navigations import DEEP_NESTED_NODES
+
+
+async def async_nodes(request):
+    await asyncio.sleep(0)
+    return DEEP_NESTED_NODES[:10]
+
+
+def sync_nodes(request):
+    return DEEP_NESTED_NODES[10:]
+
+
+class AsyncNavigationTests(TestCase):
+    def test_aget_navigation(self):
+        request = RequestFactory().get('/a/b/')
+        navigation = async_to_sync(aget_navigation)(request, async_nodes, 'a', build=('tree',))
+        self.assertIn('tree', navigation.__dict__)
+        self.assertIs(navigation, get_navigation(request, 'a'))
+        self.assertEqual('/a/', navigation.tree[0].url)
+
+    def test_providers_run_concurrently(self):
+        async def test():
+            first, second = asyncio.Event(), asyncio.Event()
+
+            async def first_nodes(request):
+                first.set()
+                await asyncio.wait_for(second.wait(), 1)
+                return DEEP_NESTED_NODES
+
+            async def second_nodes(request):
+                second.set()
+                await asyncio.wait_for(first.wait(), 1)
+                return 'deep_nested'
+
+            return await aget_navigations(request, {'first': first_nodes, 'second': second_nodes})
+
+        request = RequestFactory().get('/a/b/')
+        navigations = async_to_sync(test)()
+        self.assertEqual([n.url for n in navigations['first'].breadcrumbs],
+                [n.url for n in navigations['second'].breadcrumbs])
+
+    def test_sync(self):
+        request = RequestFactory().get('/c/a/')
+        navigations = get_navigations(request, {'a': async_nodes, 'c': sync_nodes})
+        self.assertEqual(['/c/', '/c/a/'], [n.url for n in navigations['c'].breadcrumbs])
+        self.assertEqual([], navigations['a'].breadcrumbs)
+
+
+@modify_settings(MIDDLEWARE={'append': 'src.multinavigation.middleware.NavigationMiddleware'})
+@override_settings(MULTINAV_PROVIDERS={
+    'a': 'src.multinavigation.test_asynchronous.async_nodes',
+    'c': 'src.multinavigation.test_asynchronous.sync_nodes',
+})
+class NavigationMiddlewareTests(TestCase):
+    template = Template('{% load multinavigation %}{% breadcrumbs request "c" %}')
+
+    def test_async(self):
+        async def get():
+            return await self.async_client.get('/c/a/')
+
+        response = async_to_sync(get)()
+        request = response.asgi_request
+        self.assertEqual(['a', 'c'], sorted(request.navigations))
+        self.assertIn('CA [/c/a/]', self.template.render(Context({'request': request})))
+
+    def test_sync(self):
+        request = self.client.get('/c/a/').wsgi_request
+        self.assertIs(request.navigations['c'], get_navigation(request, 'c'))
+        self.assertIn('CA [/c/a/]', self.template.render(Context({'request': request})))
+
+
+def permission_nodes(request):
+    return [
+        Node('url-a', 'A', '', {}),
+        Node('url-ab', 'AB', 'url-a', {'permissions': 'auth.view_user'}),
+    ]
+
+
+@modify_settings(MIDDLEWARE={'append': 'src.multinavigation.middleware.NavigationMiddleware'})
+@override_settings(MULTINAV_PREBUILD=('tree',), MULTINAV_PROVIDERS={
+    'a': 'src.multinavigation.test_asynchronous.permission_nodes',
+})
+class PrebuildPermissionsTests(TestCase):
+    def test_async(self):
+        user = User.objects.create_user('user')
+        user.user_permissions.add(Permission.objects.get(codename='view_user'))
+        self.async_client.force_login(user)
+
+        async def get():
+            return await self.async_client.get('/a/b/')
+
+        request = async_to_sync(get)().asgi_request
+        tree = request.navigations['a'].tree
+        self.assertEqual(['AB'], [n.label for n in tree[0].children])
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+
+from . import batch, navigation as navigation_module
+from .batch import group_paths, iter_navigations
+from .navigation import get_navigation
+from .registry import NavigationRegistry
+from .visibility import Visibility
+from .test_navigation import NODES, PETS
+from src.test_app.navigations import DEEP_NESTED_NODES
+
+DEEP_PATHS = ['/a/', '/a/b/c/d/', '/c/a/', '/b/', '/a/b/c/a/', '/missing/']
+
+PET_PATHS = ['/animals/dogs/rex/', '/animals/cats/tom/', '/animals/dogs/max/',
+        '/animals/birds/tweety/', '/home/']
+
+
+def get_state(path, nodes):
+    """ What iter_navigations should yield for path, through a request """
+    request = RequestFactory().get(path)
+    navigation = get_navigation(request, nodes)
+    if not navigation.is_resolved:
+        return (path, frozenset(), [], [])
+    return (path, navigation.active_indexes, navigation.breadcrumbs, navigation.subnavigation)
+
+
+class BatchTests(TestCase):
+    def assertStates(self, nodes, paths, states):
+        self.assertEqual(sorted(paths), sorted(s.path for s in states))
+        for state in states:
+            self.assertEqual(get_state(state.path, nodes), tuple(state))
+
+    def test_iter_navigations(self):
+        self.assertStates(DEEP_NESTED_NODES, DEEP_PATHS,
+                list(iter_navigations(DEEP_NESTED_NODES, DEEP_PATHS)))
+        nodes = NODES + PETS
+        self.assertStates(nodes, PET_PATHS, list(iter_navigations(nodes, PET_PATHS)))
+
+    def test_shared_state(self):
+        with mock.patch.object(batch, 'Visibility', wraps=Visibility) as visibility, \
+                mock.patch.object(navigation_module, 'Visibility') as per_request:
+            states = list(iter_navigations(DEEP_NESTED_NODES, DEEP_PATHS))
+        self.assertEqual(1, visibility.call_count)
+        self.assertFalse(per_request.called)
+        self.assertStates(DEEP_NESTED_NODES, DEEP_PATHS, states)
+
+    def test_group_paths(self):
+        # the URL of the node Any depends on both the category and the name
+        groups = group_paths(NODES + PETS, PET_PATHS + ['/animals/dogs/rex/'])
+        self.assertEqual(
+            [['/animals/dogs/rex/', '/animals/dogs/rex/'], ['/animals/cats/tom/'],
+             ['/animals/dogs/max/'], ['/animals/birds/tweety/'], ['/home/']],
+            [[path for path, match in group] for group in groups])
+        # the static nodes don't depend on the kwargs
+        groups = group_paths(DEEP_NESTED_NODES, ['/a/b/', '/a/', '/a/b/', '/missing/'])
+        self.assertEqual([['/a/b/', '/a/b/'], ['/a/'], ['/missing/']],
+                [[path for path, match in group] for group in groups])
+        self.assertIsNone(groups[-1][0][1])
+
+    def test_registered(self):
+        navigations = NavigationRegistry()
+        navigations.register('nav', NODES + PETS)
+        with mock.patch.object(navigation_module, 'registry', navigations), \
+                mock.patch('src.multinavigation.batch.registry', navigations):
+            states = list(iter_navigations('nav', PET_PATHS))
+            self.assertStates('nav', PET_PATHS, states)
+
+    def test_processes(self):
+        states = list(iter_navigations(DEEP_NESTED_NODES, DEEP_PATHS, processes=2, chunksize=1))
+        self.assertStates(DEEP_NESTED_NODES, DEEP_PATHS, states)
@@ -0,0 +1,24 @@
+from django.test import TestCase
+
+from .benchmark import TAGS, generate, run_benchmark
+
+
+class BenchmarkTests(TestCase):
+    def test_generate(self):
+        nodes, urlpatterns, path = generate(30, 3, placeholders=True)
+        self.assertEqual(30, len(nodes))
+        self.assertEqual(30, len(urlpatterns))
+        self.assertEqual('/main/n0/n0-2/n0-2-1/', path)
+        self.assertEqual('n0-2-1', nodes[-1].url_name)
+
+    def test_run_benchmark(self):
+        results = list(run_benchmark([10], [2], repeat=1))
+        self.assertEqual(2 * len(TAGS), len(results))
+        for result in results:
+            # the cold run resolves the path and reverses the URLs it
+            # needs, the next ones find them in the caches
+            self.assertEqual(1, result['cold_resolve'])
+            self.assertGreater(result['cold_reverse'], 0)
+            self.assertGreater(result['cold_ms'], 0)
+            self.assertEqual((0, 0), (result['resolve'], result['reverse']))
+            self.assertGreater(result['build_ms'], 0)
@@ -0,0 +1,34 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .navigation import Navigation
+
+
+@override_settings(MULTINAV_FRAGMENT_CACHE='default')
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self, path):
+        with mock.patch.object(Navigation, 'add_nodes', autospec=True,
+                side_effect=Navigation.add_nodes) as patched:
+            response = self.client.get(path)
+        return response.content, patched.call_count
+
+    def test_same_state_skips_rendering(self):
+        with override_settings(MULTINAV_FRAGMENT_CACHE=None):
+            uncached, _ = self.get('/a/b/c/d/')
+        content, built = self.get('/a/b/c/d/')
+        self.assertEqual(uncached, content)
+        self.assertTrue(built)
+        content, built = self.get('/a/b/c/d/')
+        self.assertEqual(uncached, content)
+        self.assertFalse(built)
+
+    def test_active_state_in_key(self):
+        self.get('/a/b/c/d/')
+        content, built = self.get('/a/b/c/a/')
+        self.assertTrue(built)
+        self.assertContains(self.client.get('/a/b/c/a/'), '[ABCA] [/a/b/c/a/] [active]')
@@ -0,0 +1,103 @@
+from collections import namedtuple
+from unittest import mock
+
+from django.test import TestCase
+
+from . import compiled as compiled_module
+from .compiled import CompiledNavigation, get_compiled_navigation, get_structure
+from .conf import Node
+
+Match = namedtuple('Match', 'url_name kwargs')
+
+NODES = [
+    Node('animals', 'Animals', '', {}),
+    Node('animals_category', 'Dogs', 'animals', {'url_kwargs': 'category:dogs'}),
+    Node('animals_category', 'Cats', 'animals', {'url_kwargs': 'category:cats'}),
+    Node('pet', 'Dog', 'animals_category|category:dogs', {'url_kwargs': 'category:dogs,name:'}),
+    Node('pet', 'Cat', 'animals_category|category:cats', {'url_kwargs': 'category:cats,name:'}),
+    Node('vet', 'Vet', 'animals_category', {}),
+    Node('orphan', 'Orphan', 'missing', {}),
+    Node('contact', 'Contact', '', {}),
+]
+
+
+class CompiledNavigationTests(TestCase):
+    def setUp(self):
+        self.compiled = get_compiled_navigation(NODES)
+
+    def test_roots(self):
+        self.assertEqual((0, 7), self.compiled.roots)
+
+    def test_children_without_kwargs(self):
+        self.assertEqual((1, 2), self.compiled.get_children(0, {}))
+        self.assertEqual((), self.compiled.get_children(7, {}))
+
+    def test_children_matching_parent_kwargs_keep_order(self):
+        self.assertEqual((3, 5), self.compiled.get_children(1, {'category': 'dogs'}))
+        self.assertEqual((4, 5), self.compiled.get_children(2, {'category': 'cats'}))
+        self.assertEqual((5,), self.compiled.get_children(2, {'category': 'birds'}))
+        # with more kwargs than groups, the groups are scanned instead
+        self.assertEqual((3, 5), self.compiled.get_children(1, {'category': 'dogs', 'a': '1', 'b': '2'}))
+
+    def test_structure_ignores_labels(self):
+        relabelled = [n._replace(label='x') for n in NODES]
+        self.assertEqual(get_structure(NODES), get_structure(relabelled))
+        self.assertIs(self.compiled, get_compiled_navigation(relabelled))
+
+    def test_static_skeleton(self):
+        self.assertTrue(self.compiled.is_static(1))
+        self.assertFalse(self.compiled.is_static(3))
+        urls = self.compiled.get_static_urls()
+        self.assertEqual(('/animals/', '/animals/dogs/', '/animals/cats/', None, None),
+                urls[:5])
+        # unknown url names are static too, they just can't be reversed
+        self.assertEqual('', urls[5])
+        self.assertIs(urls, self.compiled.get_static_urls())
+
+    def test_resolve_dynamic_node(self):
+        urls = self.compiled.get_static_urls()
+        match = Match('pet', {'category': 'dogs', 'name': 'rex'})
+        self.assertEqual(('/animals/dogs/rex/', ()), self.compiled.resolve_node(3, match, urls))
+        self.assertEqual(('', ()), self.compiled.resolve_node(4, match, urls))
+        self.assertEqual(('/animals/dogs/', (3, 5)), self.compiled.resolve_node(1, match, urls))
+
+    def test_active_paths(self):
+        compiled = self.compiled.copy()
+        compiled.set_active_path('a', 1)
+        compiled.set_active_path('b', 2)
+        self.assertEqual(1, compiled.get_active_path('a'))
+        with mock.patch.object(compiled_module, 'ACTIVE_PATHS_SIZE', 2):
+            compiled.set_active_path('c', 3)
+        # b was the least recently used
+        self.assertEqual((1, None, 3), tuple(compiled.get_active_path(k) for k in 'abc'))
+        # dropped by any change of the structure, and not copied
+        self.assertIsNone(compiled.copy().get_active_path('a'))
+        compiled.move(3, 'animals')
+        self.assertIsNone(compiled.get_active_path('a'))
+
+
+def get_state(compiled):
+    """ Everything a compiled navigation answers, to compare them """
+    urls = compiled.get_static_urls()
+    return (compiled.structure, compiled.roots, compiled.static_children,
+            compiled.static_subtree, compiled.dynamic, compiled.dynamic_keys, urls,
+            [sorted(compiled.get_active_indexes(url)) for url in urls if url])
+
+
+class IncrementalUpdateTests(TestCase):
+    def test_updates_match_compiling_again(self):
+        compiled = get_compiled_navigation(NODES).copy()
+        compiled.get_static_urls()
+        versions = list(compiled.versions)
+        self.assertEqual(8, compiled.add(('animals_category', 'animals', 'category:birds')))
+        self.assertEqual(get_state(CompiledNavigation(compiled.structure)), get_state(compiled))
+        compiled.move(5, 'animals')
+        compiled.remove(2)
+        self.assertEqual(get_state(CompiledNavigation(compiled.structure)), get_state(compiled))
+        # the subtree of contact didn't change, the one of animals did
+        self.assertEqual(versions[7], compiled.versions[7])
+        self.assertLess(versions[0], compiled.versions[0])
+        self.assertEqual((1, 5, 8), compiled.get_children(0, {}))
+        self.assertEqual((3,), compiled.get_children(1, {'category': 'dogs'}))
+        # the shared one is left alone
+        self.assertEqual(get_structure(NODES), get_compiled_navigation(NODES).structure)
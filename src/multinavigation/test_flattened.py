@@ -0,0 +1,42 @@
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+
+from .navigation import Navigation
+from .streaming import stream_navigation
+from src.test_app.navigations import DEEP_NESTED_NODES
+
+
+def get_paths(tree_nodes, depth=0):
+    """ (label, depth) of the tree nodes, depth-first """
+    for tnode in tree_nodes:
+        yield tnode.label, depth
+        yield from get_paths(tnode.children, depth + 1)
+
+
+class FlattenedTests(TestCase):
+    def test_flattened(self):
+        navigation = Navigation(RequestFactory().get('/a/b/c/d/'), DEEP_NESTED_NODES)
+        flattened = navigation.flattened
+        self.assertEqual(list(get_paths(navigation.tree)), [(n.label, n.depth) for n in flattened])
+        by_label = dict((n.label, n) for n in flattened)
+        self.assertEqual((False, True, 0), (by_label['A'].opens, by_label['A'].has_children,
+                by_label['A'].closes))
+        self.assertEqual((True, False, 0), (by_label['AA'].opens, by_label['AA'].has_children,
+                by_label['AA'].closes))
+        # ABCD ends the levels of ABC, AB and A
+        self.assertEqual(3, by_label['ABCD'].closes)
+        self.assertEqual(['A', 'AB', 'ABC', 'ABCD'], [n.label for n in flattened if n.active])
+        self.assertEqual(sum(n.opens for n in flattened), sum(n.closes for n in flattened))
+
+    def test_flattabnavigation(self):
+        request = RequestFactory().get('/c/a/')
+        output = Template('{% load multinavigation %}{% flattabnavigation request nodes %}').render(
+            Context({'request': request, 'nodes': DEEP_NESTED_NODES}))
+        self.assertIn('\n- C [+] [active] [0][tab]\n- CA [active] [1]\n- CB [1]\n- CC [1][/tab]', output)
+        self.assertEqual(output.count('[tab]'), output.count('[/tab]'))
+
+    def test_tabnavigation_html(self):
+        request = RequestFactory().get('/c/a/')
+        output = Template('{% load multinavigation %}{% tabnavigation_html request nodes %}').render(
+            Context({'request': request, 'nodes': DEEP_NESTED_NODES}))
+        self.assertEqual(''.join(stream_navigation(request, DEEP_NESTED_NODES)), output)
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.conf.urls.i18n import i18n_patterns
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import re_path
+from django.utils.functional import lazy
+from django.utils.translation import get_language, override
+
+from . import navigation as navigation_module, resolvers
+from .conf import Node
+from .navigation import get_navigation
+from .registry import NavigationRegistry
+
+
+def view(request):
+    pass
+
+
+urlpatterns = i18n_patterns(
+    re_path(r'^a/$', view, name='url-a'),
+    re_path(r'^a/b/$', view, name='url-ab'),
+)
+
+
+def label(text):
+    return lazy(lambda: '{}-{}'.format(text, get_language()), str)()
+
+
+NODES = [
+    Node('url-a', label('A'), '', {}),
+    Node('url-ab', label('AB'), 'url-a', {}),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, USE_I18N=True,
+        LANGUAGES=[('en', 'English'), ('de', 'German')])
+class MultiLanguageTests(TestCase):
+    def test_tables_by_language(self):
+        navigations = NavigationRegistry()
+        registered = navigations.register('nav', NODES)
+        navigations.warm_up()
+        self.assertEqual(['en', 'de'], sorted(registered.snapshot._labels, reverse=True))
+        reverse = mock.Mock(wraps=resolvers.reverse)
+        with mock.patch.object(navigation_module, 'registry', navigations), \
+                mock.patch.object(resolvers, 'reverse', reverse):
+            for language in ('de', 'en', 'de'):
+                with override(language):
+                    request = RequestFactory().get('/{}/a/b/'.format(language))
+                    tree = get_navigation(request, 'nav').tree
+                    self.assertEqual(['A-' + language, 'AB-' + language],
+                            [tree[0].label, tree[0].children[0].label])
+                    self.assertEqual('/{}/a/b/'.format(language), tree[0].children[0].url)
+                    self.assertTrue(tree[0].children[0].active)
+        self.assertFalse(reverse.called)
@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+from django.urls import resolve
+
+from . import navigation, resolvers
+from .navigation import get_navigation, get_url_match, iter_tree_nodes
+from .resolvers import clear_caches
+from .conf import Node
+from src.test_app.context_processors import multinavigation
+
+NODES = [
+    Node('home', 'Home', '', {}),
+    Node('animals', 'Animals', '', {}),
+    Node('animals_category', 'Dogs', 'animals', {'url_kwargs': 'category:dogs'}),
+    Node('animals_category', 'Cats', 'animals', {'url_kwargs': 'category:cats'}),
+]
+
+PETS = [
+    Node('pet', 'Dog', 'animals_category|category:dogs', {'url_kwargs': 'category:dogs,name:'}),
+    Node('pet', 'Cat', 'animals_category|category:cats', {'url_kwargs': 'category:cats,name:'}),
+    Node('pet', 'Any', 'animals_category', {'url_kwargs': 'category:,name:'}),
+]
+
+
+def tree_breadcrumbs(nav):
+    """ The breadcrumbs, found by walking the whole tree """
+    def get_breadcrumbs(node):
+        if node.active:
+            yield node
+        for n in node.children:
+            yield from get_breadcrumbs(n)
+    return [(n.label, n.url) for n in get_breadcrumbs(nav.active_root)] if nav.active_root else []
+
+
+class NavigationTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/animals/cats/')
+
+    def test_memoized_on_request(self):
+        nav = get_navigation(self.request, NODES)
+        self.assertIs(nav, get_navigation(self.request, NODES))
+        self.assertIsNot(nav, get_navigation(self.request, list(NODES)))
+
+    def test_state(self):
+        nav = get_navigation(self.request, NODES)
+        self.assertEqual(['Home', 'Animals'], [n.label for n in nav.flat])
+        self.assertEqual('Animals', nav.active_root.label)
+        self.assertEqual(['Dogs', 'Cats'], [n.label for n in nav.subnavigation])
+        self.assertEqual(['Animals', 'Cats'], [n.label for n in nav.breadcrumbs])
+
+    def test_unresolved_request(self):
+        nav = get_navigation(RequestFactory().get('/nowhere/'), NODES)
+        self.assertFalse(nav.is_resolved)
+        self.assertEqual([], nav.tree)
+        self.assertEqual([], nav.breadcrumbs)
+
+    def test_page_reuses_resolver_match(self):
+        with mock.patch.object(resolvers, 'resolve', wraps=resolve) as patched:
+            response = self.client.get('/animals/cats/')
+        self.assertEqual(0, patched.call_count)
+        request = response.wsgi_request
+        self.assertIs(request.resolver_match, get_navigation(request, NODES).url_match)
+
+    def test_resolve_cached(self):
+        clear_caches()
+        with mock.patch.object(resolvers, 'resolve', wraps=resolve) as patched:
+            for path in ['/animals/cats/', '/animals/cats/', '/nowhere/', '/nowhere/']:
+                get_url_match(RequestFactory().get(path))
+            self.assertEqual(2, patched.call_count)
+            # with a script prefix the resolver_match is for another path
+            request = RequestFactory().get('/animals/cats/', SCRIPT_NAME='/prefix')
+            request.resolver_match = resolve('/animals/cats/')
+            self.assertIsNone(get_url_match(request))
+        self.assertEqual(3, patched.call_count)
+
+    def test_breadcrumbs_same_as_tree(self):
+        fixtures = multinavigation(None)
+        for nodes, paths in [
+                (fixtures['DEEP_NESTED_MULTINAV_NODES'],
+                    ['/a/', '/a/b/c/d/', '/a/b/c/', '/b/', '/c/c/', '/home/']),
+                (fixtures['MULTINAV_NODES'] + PETS,
+                    ['/home/', '/animals/', '/animals/dogs/', '/animals/cats/tom/',
+                        '/animals/monkeys/bobo/'])]:
+            for path in paths:
+                nav = get_navigation(RequestFactory().get(path), nodes)
+                self.assertEqual(tree_breadcrumbs(nav),
+                        [(n.label, n.url) for n in nav.breadcrumbs], path)
+
+    def test_subnavigation_without_tree(self):
+        nodes = multinavigation(None)['DEEP_NESTED_MULTINAV_NODES']
+        for path in ['/a/b/c/d/', '/b/', '/c/a/', '/home/']:
+            nav = get_navigation(RequestFactory().get(path), nodes)
+            subnavigation = nav.subnavigation
+            self.assertNotIn('tree', nav.__dict__)
+            expected = list(nav.active_root.children) if nav.active_root else []
+            self.assertEqual(expected, subnavigation, path)
+
+    def test_active_path_memoized(self):
+        nodes = NODES + PETS
+        with mock.patch.object(navigation.Navigation, 'find_active_path', autospec=True,
+                side_effect=navigation.Navigation.find_active_path) as find:
+            for path in ['/animals/dogs/rex/', '/animals/dogs/rex/', '/animals/cats/tom/']:
+                nav = get_navigation(RequestFactory().get(path), nodes)
+                self.assertEqual('Animals', nav.breadcrumbs[0].label)
+                self.assertEqual(tree_breadcrumbs(nav), [(n.label, n.url) for n in nav.breadcrumbs])
+                # the tree is marked from the same active indexes
+                for _, tnode, _ in iter_tree_nodes(nav.tree):
+                    if tnode is not None:
+                        self.assertEqual(navigation.is_active(nav.request, tnode.url),
+                                tnode.active, tnode.url)
+        self.assertEqual(2, find.call_count)
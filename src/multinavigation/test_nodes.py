@@ -0,0 +1,53 @@
+from django.test import RequestFactory, TestCase
+
+from .conf import Node
+from .navigation import Navigation, get_navigation
+from .nodes import FrozenNode, TreeNode, freeze_nodes
+from .registry import registry
+from src.test_app.navigations import DEEP_NESTED_NODES
+
+
+class FrozenNodeTests(TestCase):
+    def test_frozen_node(self):
+        node = Node('pet', 'Dog', 'animals_category|category:dogs', {'url_kwargs': 'category:dogs,name:'})
+        frozen = FrozenNode(*node)
+        self.assertEqual(node, frozen)
+        self.assertEqual(frozen, node)
+        self.assertEqual(tuple(node), tuple(frozen))
+        with self.assertRaises(AttributeError):
+            frozen.label = 'Cat'
+        with self.assertRaises(TypeError):
+            frozen.context['url_kwargs'] = ''
+
+    def test_freeze_nodes_shares_contexts(self):
+        nodes = freeze_nodes([
+            Node('home', 'Home', '', {'css_class': 'a'}),
+            Node(''.join(['ho', 'me']), 'Home', '', {'css_class': 'a'}),
+            Node('other', 'Other', '', {'css_class': ['unhashable']}),
+        ])
+        self.assertIs(nodes[0].context, nodes[1].context)
+        self.assertIs(nodes[0].url_name, nodes[1].url_name)
+        self.assertEqual({'css_class': ['unhashable']}, nodes[2].context)
+
+    def test_tree_node(self):
+        node = FrozenNode('home', 'Home', '', {'css_class': 'a'})
+        tnode = TreeNode(node, '/home/', True)
+        self.assertEqual(('Home', {'css_class': 'a'}, ()),
+                (tnode.label, tnode.context, tnode.children))
+        self.assertEqual(TreeNode(Node(*node), '/home/', True, []), tnode)
+
+
+class SharedSubtreesTests(TestCase):
+    def test_inactive_static_subtrees_are_shared(self):
+        registered = registry.get('deep_nested')
+        first = get_navigation(RequestFactory().get('/c/a/'), 'deep_nested').tree
+        second = get_navigation(RequestFactory().get('/a/b/'), 'deep_nested').tree
+        # the subtree of a is only shared while it's not active
+        self.assertIs(first[0], registered.get_shared_subtrees()[None][0][1])
+        self.assertIsNot(first[0], second[0])
+        self.assertIs(first[1], second[1])
+        self.assertIsNot(first[2], second[2])
+        for path in ('/c/a/', '/a/b/'):
+            request = RequestFactory().get(path)
+            unshared = Navigation(request, DEEP_NESTED_NODES)
+            self.assertEqual(unshared.tree, get_navigation(request, 'deep_nested').tree)
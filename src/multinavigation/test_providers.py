@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import RequestFactory, TestCase
+
+from .navigation import get_navigation
+from .providers import ModelNodesProvider
+from src.test_app.models import MenuEntry
+
+provider = ModelNodesProvider(MenuEntry, context_fields=['css_class'])
+
+
+class ModelNodesProviderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        animals = MenuEntry.objects.create(url_name='animals', label='Animals', position=1)
+        dogs = MenuEntry.objects.create(url_name='animals_category', label='Dogs',
+                parent=animals, url_kwargs='category:dogs', css_class='dogs', position=2)
+        MenuEntry.objects.create(url_name='pet', label='Dog', parent=dogs,
+                url_kwargs='category:dogs,name:', position=3)
+        MenuEntry.objects.create(url_name='home', label='Home')
+
+    def test_nodes(self):
+        with self.assertNumQueries(1):
+            nodes = provider()
+        self.assertEqual([
+            ('home', 'Home', '', {'css_class': ''}),
+            ('animals', 'Animals', '', {'css_class': ''}),
+            ('animals_category', 'Dogs', 'animals', {'css_class': 'dogs', 'url_kwargs': 'category:dogs'}),
+            ('pet', 'Dog', 'animals_category|category:dogs',
+                {'css_class': '', 'url_kwargs': 'category:dogs,name:'}),
+        ], [tuple(n) for n in nodes])
+        request = RequestFactory().get('/animals/dogs/rex/')
+        self.assertEqual(['Animals', 'Dogs', 'Dog'],
+                [n.label for n in get_navigation(request, nodes).breadcrumbs])
+
+    def test_version(self):
+        nodes = provider()
+        with self.assertNumQueries(0):
+            self.assertIs(nodes, provider())
+        MenuEntry.objects.filter(url_name='home').update(label='Start')
+        self.assertIs(nodes, provider())
+        provider.invalidate()
+        self.assertEqual('Start', provider()[0].label)
+        MenuEntry.objects.get(url_name='home').delete()
+        self.assertEqual(['animals', 'animals_category', 'pet'],
+                [n.url_name for n in provider()])
+
+    def test_shared_cache(self):
+        nodes = provider()
+        receivers = len(post_save.receivers)
+        other = ModelNodesProvider(MenuEntry, context_fields=['css_class'])
+        with self.assertNumQueries(0):
+            self.assertEqual(nodes, other())
+        # the receiver of the first provider bumps the version of both
+        self.assertEqual(receivers, len(post_save.receivers))
+
+    def test_different_providers(self):
+        nodes = provider()
+        receivers = len(post_save.receivers)
+        top = ModelNodesProvider(MenuEntry, context_fields=['css_class'],
+                queryset=MenuEntry.objects.filter(parent=None))
+        plain = ModelNodesProvider(MenuEntry)
+        with self.assertNumQueries(2):
+            self.assertEqual(['home', 'animals'], [n.url_name for n in top()])
+            self.assertEqual({}, plain()[0].context)
+        self.assertEqual(4, len(provider()))
+        # they still share the version
+        self.assertEqual(receivers, len(post_save.receivers))
+        MenuEntry.objects.create(url_name='contact', label='Contact', position=4)
+        self.assertEqual(['home', 'animals', 'contact'], [n.url_name for n in top()])
+        self.assertIsNot(nodes, provider())
+
+    def test_name(self):
+        provider()
+        named = ModelNodesProvider(MenuEntry, name='menu')
+        other = ModelNodesProvider(MenuEntry, context_fields=['css_class'], name='menu')
+        with self.assertNumQueries(1):
+            self.assertEqual(named(), other())
+
+    def test_old_rows_dropped(self):
+        provider()
+        old_key = provider.get_rows_key(provider.get_version())
+        self.assertIsNotNone(cache.get(old_key))
+        MenuEntry.objects.create(url_name='contact', label='Contact', position=4)
+        provider()
+        self.assertIsNone(cache.get(old_key))
+        # kept for the cache's default timeout
+        self.assertIsNotNone(cache._expire_info[cache.make_key(
+            provider.get_rows_key(provider.get_version()))])
@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.apps import apps
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+
+from .conf import Node
+from .compiled import get_compiled_navigation
+from .navigation import Navigation, get_navigation
+from . import navigation as navigation_module, registry as registry_module, resolvers
+from .registry import AlreadyRegistered, NavigationRegistry, NotRegistered, registry
+from .resolvers import clear_caches
+from src.test_app.navigations import DEEP_NESTED_NODES
+
+
+class RegistryTests(TestCase):
+    def test_loaded_from_settings(self):
+        self.assertIn('main', registry)
+        self.assertEqual(DEEP_NESTED_NODES, list(registry.get('deep_nested').nodes))
+
+    def test_register(self):
+        navigations = NavigationRegistry()
+        registered = navigations.register('nav', [Node('home', 'Home', '', {})])
+        self.assertIs(registered, navigations.get('nav'))
+        self.assertIs(registered.compiled, navigations.get('nav').compiled)
+        with self.assertRaises(AlreadyRegistered):
+            navigations.register('nav', [])
+        navigations.unregister('nav')
+        with self.assertRaises(NotRegistered):
+            navigations.get('nav')
+
+    def test_navigation_by_name(self):
+        request = RequestFactory().get('/a/b/')
+        navigation = get_navigation(request, 'deep_nested')
+        self.assertIs(navigation, get_navigation(request, 'deep_nested'))
+        self.assertIs(registry.get('deep_nested').compiled, navigation.compiled)
+
+    def test_tags_by_name(self):
+        request = RequestFactory().get('/a/b/c/d/')
+        template = Template('{% load multinavigation %}'
+                '{% tabnavigation request navigation %}{% breadcrumbs request navigation %}')
+        self.assertEqual(
+            template.render(Context({'request': request, 'navigation': DEEP_NESTED_NODES})),
+            template.render(Context({'request': request, 'navigation': 'deep_nested'})))
+        self.assertIn('ABCD [/a/b/c/d/]', Template(
+            '{% load multinavigation %}{% breadcrumbs request "deep_nested" %}'
+        ).render(Context({'request': request})))
+
+    def test_warm_up(self):
+        navigations = NavigationRegistry()
+        registered = navigations.register('nav', DEEP_NESTED_NODES)
+        with self.assertLogs('src.multinavigation.registry', 'INFO') as logs:
+            elapsed = navigations.warm_up()
+        self.assertEqual(elapsed, navigations.warmup_time)
+        self.assertIn('Warmed up 1 navigation(s) with 15 nodes', logs.output[0])
+        with mock.patch('src.multinavigation.compiled.safe_reverse') as patched:
+            registered.compiled.get_static_urls()
+        self.assertFalse(patched.called)
+
+    def test_warm_up_for_requests(self):
+        clear_caches()
+        navigations = NavigationRegistry()
+        registered = navigations.register('deep_nested', DEEP_NESTED_NODES)
+        navigations.warm_up()
+        with mock.patch.object(navigation_module, 'registry', navigations), \
+                mock.patch.object(resolvers, 'reverse', wraps=resolvers.reverse) as reverse:
+            response = self.client.get('/registered/')
+        self.assertContains(response, '/a/b/c/d/')
+        self.assertFalse(reverse.called)
+        # the same table out of and in requests
+        self.assertEqual(1, len(registered.compiled._static_urls))
+
+    def test_warm_up_on_ready(self):
+        config = apps.get_app_config('multinavigation')
+        for warmup in (False, True):
+            navigations = NavigationRegistry()
+            with mock.patch.object(registry_module, 'registry', navigations), \
+                    override_settings(MULTINAV_WARMUP=warmup):
+                config.ready()
+            self.assertEqual(warmup, navigations.warmup_time is not None)
+
+    def test_incremental_updates(self):
+        navigations = NavigationRegistry()
+        registered = navigations.register('nav', DEEP_NESTED_NODES)
+        with mock.patch.object(navigation_module, 'registry', navigations):
+            tree = get_navigation(RequestFactory().get('/c/'), 'nav').tree
+            registered.relabel_node(3, 'Renamed')
+            registered.move_node(12, 'url-b')
+            registered.remove_node(13)
+            self.assertEqual(15, registered.add_node(Node('url-cb', 'CB', 'url-b', {})))
+            for path in ('/c/', '/b/', '/a/b/a/'):
+                request = RequestFactory().get(path)
+                expected = Navigation(request, [n for n in registered.nodes if n is not None])
+                self.assertEqual(expected.tree, get_navigation(request, 'nav').tree)
+            # the subtree of a isn't built again
+            self.assertIs(tree[0].children[0],
+                    get_navigation(RequestFactory().get('/c/'), 'nav').tree[0].children[0])
+        self.assertIsNot(registered.compiled, get_compiled_navigation(DEEP_NESTED_NODES))
+
+    def test_updates_during_request(self):
+        navigations = NavigationRegistry()
+        registered = navigations.register('nav', DEEP_NESTED_NODES)
+        registered.add_node(Node('url-cb', 'CB', 'url-b', {}))
+        request = RequestFactory().get('/b/')
+        expected = Navigation(request, registered.nodes).tree
+        with mock.patch.object(navigation_module, 'registry', navigations):
+            navigation = get_navigation(request, 'nav')
+            registered.add_node(Node('url-ca', 'CA', 'url-b', {}))
+            registered.add_node(Node('url-ab', 'AB', 'url-b', {}))
+            # the navigation keeps the nodes it started with
+            self.assertEqual(expected, navigation.tree)
+            self.assertEqual(len(expected[1].children) + 2,
+                    len(get_navigation(RequestFactory().get('/b/'), 'nav').tree[1].children))
+
+    def test_relabel_copies_compiled(self):
+        registered = NavigationRegistry().register('nav', DEEP_NESTED_NODES)
+        shared = get_compiled_navigation(DEEP_NESTED_NODES)
+        versions = list(shared.versions)
+        registered.relabel_node(3, 'Renamed')
+        self.assertIsNot(shared, registered.compiled)
+        self.assertEqual(versions, shared.versions)
+        self.assertEqual('Renamed', registered.nodes[3].label)
@@ -0,0 +1,31 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import resolvers
+from .resolvers import cached_reverse, clear_caches, reverse_cache_info
+
+
+class ReverseCacheTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_cached_reverse(self):
+        with mock.patch.object(resolvers, 'reverse', wraps=reverse) as patched:
+            self.assertEqual('/animals/dogs/', cached_reverse('animals_category', {'category': 'dogs'}))
+            self.assertEqual('/animals/dogs/', cached_reverse('animals_category', {'category': 'dogs'}))
+            self.assertEqual('/animals/cats/', cached_reverse('animals_category', {'category': 'cats'}))
+        self.assertEqual(2, patched.call_count)
+        info = reverse_cache_info()
+        self.assertEqual((1, 2), (info.hits, info.misses))
+
+    def test_failures_are_cached(self):
+        self.assertEqual('', cached_reverse('animals_category', {}))
+        self.assertEqual('', cached_reverse('animals_category', {}))
+        self.assertEqual(1, reverse_cache_info().hits)
+
+    def test_cleared_on_urlconf_change(self):
+        cached_reverse('home', {})
+        with override_settings(ROOT_URLCONF='src.test_app.urls'):
+            self.assertEqual(0, reverse_cache_info().currsize)
@@ -0,0 +1,40 @@
+from django.test import TestCase, modify_settings, override_settings
+
+from .stats import get_stats, navigation_stats
+
+REPORTED = []
+
+
+def record(request, stats):
+    REPORTED.append(stats)
+
+
+@modify_settings(MIDDLEWARE={'append': 'src.multinavigation.middleware.NavigationStatsMiddleware'})
+@override_settings(MULTINAV_STATS_HEADER='X-Navigation-Stats',
+        MULTINAV_STATS_CALLBACK='src.multinavigation.test_stats.record')
+class NavigationStatsTests(TestCase):
+    def setUp(self):
+        REPORTED[:] = []
+
+    def test_stats(self):
+        received = []
+
+        def receiver(sender, request, stats, **kwargs):
+            received.append(stats)
+
+        navigation_stats.connect(receiver)
+        try:
+            response = self.client.get('/a/b/c/d/')
+        finally:
+            navigation_stats.disconnect(receiver)
+        stats = response.wsgi_request.navigation_stats
+        self.assertEqual([stats], received)
+        self.assertEqual([stats], REPORTED)
+        # the navigation took the match Django resolved
+        self.assertEqual((0, 1), (stats.resolve_calls, stats.resolve_reused))
+        # the whole tree (reused by the subnavigation) and the flat navigation
+        self.assertEqual(15 + 3, stats.nodes)
+        self.assertGreater(stats.build_time, 0)
+        self.assertGreater(stats.render_time, 0)
+        self.assertIn('resolve_reused=1 ', response['X-Navigation-Stats'])
+        self.assertIsNone(get_stats())
@@ -0,0 +1,56 @@
+from django.test import RequestFactory, TestCase
+
+from .navigation import Navigation, get_navigation, iter_tree_nodes
+from .nodes import CLOSE, NODE, OPEN
+from .streaming import ChunkedRenderer, stream_navigation
+from src.test_app.navigations import DEEP_NESTED_NODES
+
+
+def describe(events):
+    return [(kind, node and (node.label, node.url, node.active), depth)
+            for kind, node, depth in events]
+
+
+class IterTreeTests(TestCase):
+    def test_events_match_the_tree(self):
+        for path in ('/a/b/c/d/', '/c/', '/home/'):
+            navigation = Navigation(RequestFactory().get(path), DEEP_NESTED_NODES)
+            events = describe(navigation.iter_tree())
+            self.assertNotIn('tree', navigation.__dict__)
+            self.assertEqual(describe(iter_tree_nodes(navigation.tree)), events)
+            self.assertEqual(events, describe(navigation.iter_tree()))
+
+    def test_events(self):
+        navigation = Navigation(RequestFactory().get('/c/a/'), DEEP_NESTED_NODES)
+        events = describe(navigation.iter_tree())
+        self.assertEqual((OPEN, None, 0), events[0])
+        self.assertEqual((CLOSE, None, 0), events[-1])
+        start = events.index((NODE, ('C', '/c/', True), 0))
+        self.assertEqual([
+            (OPEN, None, 1),
+            (NODE, ('CA', '/c/a/', True), 1),
+            (NODE, ('CB', '/c/b/', False), 1),
+            (NODE, ('CC', '/c/c/', False), 1),
+            (CLOSE, None, 1),
+        ], events[start + 1:start + 6])
+
+
+class ChunkedRendererTests(TestCase):
+    def test_render(self):
+        request = RequestFactory().get('/c/a/')
+        html = ''.join(stream_navigation(request, DEEP_NESTED_NODES))
+        self.assertTrue(html.startswith('<ul id="tabnavigation"><li><a href="/a/" class="">A</a>'
+                '<ul class="dropdown"><li><a href="/a/a/" class="">AA</a></li>'))
+        self.assertIn('<li><a href="/c/" class="active">C</a><ul class="dropdown">'
+                '<li><a href="/c/a/" class="active">CA</a></li>', html)
+        self.assertTrue(html.endswith('</li></ul></li></ul>'))
+        self.assertEqual(html.count('<li>'), html.count('</li>'))
+        self.assertEqual(html.count('<ul'), html.count('</ul>'))
+
+    def test_chunks(self):
+        request = RequestFactory().get('/c/a/')
+        chunks = list(stream_navigation(request, DEEP_NESTED_NODES, ChunkedRenderer(100)))
+        self.assertGreater(len(chunks), 5)
+        self.assertTrue(all(len(chunk) >= 100 for chunk in chunks[:-1]))
+        self.assertEqual(''.join(stream_navigation(request, DEEP_NESTED_NODES)), ''.join(chunks))
+        self.assertNotIn('tree', get_navigation(request, DEEP_NESTED_NODES).__dict__)
@@ -0,0 +1,26 @@
+from django.test import RequestFactory, TestCase
+
+from .navigation import is_active
+from .trie import PathTrie, RequestPath
+
+LINKS = ['/', '/bla/', '/bla/bli', '/bla/bli/blu/', '/bla/blo/', '/blu/', '']
+PATHS = ['/', '/bla/', '/bla/bli/', '/bla/bli/blu/', '/bla/bli/blu/bla/', '/blu/bla', '/x/']
+
+
+class PathTrieTests(TestCase):
+    def test_same_as_is_active(self):
+        trie = PathTrie()
+        for i, link in enumerate(LINKS):
+            trie.insert(link, i)
+        for path in PATHS:
+            request = RequestFactory().get(path)
+            expected = [i for i, link in enumerate(LINKS) if is_active(request, link)]
+            self.assertEqual(expected, sorted(trie.match(path)), path)
+            self.assertEqual(expected,
+                    [i for i, link in enumerate(LINKS) if RequestPath(path).is_active(link)], path)
+
+    def test_match_is_top_down(self):
+        trie = PathTrie()
+        trie.insert('/a/b/', 'ab')
+        trie.insert('/a/', 'a')
+        self.assertEqual(['a', 'ab'], list(trie.match('/a/b/c/')))
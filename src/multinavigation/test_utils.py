@@ -0,0 +1,41 @@
+from collections import namedtuple
+
+from django.test import TestCase
+
+from .compiled import CompiledNavigation
+from .utils import (SpecError, get_url_kwargs, parse_kwargs_spec,
+        parse_parent_spec, parse_url_name_args)
+
+Match = namedtuple('Match', 'url_name kwargs')
+
+
+class SpecParsingTests(TestCase):
+    def test_parse_kwargs_spec(self):
+        spec = parse_kwargs_spec('category:dogs, name:')
+        self.assertEqual((('category', 'dogs'),), spec.fixed)
+        self.assertEqual(('name',), spec.placeholders)
+        self.assertIs(spec, parse_kwargs_spec('category:dogs, name:'))
+
+    def test_parse_parent_spec(self):
+        spec = parse_parent_spec('animals_category|category:dogs,name:')
+        self.assertEqual('animals_category', spec.url_name)
+        self.assertEqual(frozenset([('category', 'dogs')]), spec.kwargs)
+        self.assertEqual(('animals_category', {'category': 'dogs'}),
+                parse_url_name_args('animals_category|category:dogs,name:'))
+
+    def test_get_url_kwargs_placeholders(self):
+        spec = 'category:dogs,name:'
+        self.assertEqual({'category': 'dogs', 'name': 'rex'},
+                get_url_kwargs(spec, Match('pet', {'category': 'dogs', 'name': 'rex'})))
+        # placeholders are only filled in if the fixed kwargs match
+        self.assertEqual({'category': 'dogs'},
+                get_url_kwargs(spec, Match('pet', {'category': 'cats', 'name': 'tom'})))
+        self.assertEqual({'category': 'dogs'}, get_url_kwargs(spec, None))
+
+    def test_malformed_specs(self):
+        with self.assertRaises(SpecError):
+            parse_kwargs_spec('category=dogs')
+        with self.assertRaises(SpecError):
+            parse_parent_spec('animals|category:dogs,')
+        with self.assertRaises(SpecError):
+            CompiledNavigation((('pet', 'animals|category', ''),))
@@ -0,0 +1,74 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from . import navigation as navigation_module, resolvers
+from .compiled import get_structure
+from .conf import Node
+from .registry import NavigationRegistry, registry
+from .validation import validate_navigation
+from src.test_app.navigations import DEEP_NESTED_NODES, main_nodes
+
+
+class ValidationTests(TestCase):
+    def test_valid_navigations(self):
+        self.assertEqual(([], []), validate_navigation(main_nodes()))
+        self.assertEqual(([], []), validate_navigation(DEEP_NESTED_NODES))
+
+    def test_invalid_nodes(self):
+        errors, warnings = validate_navigation([
+            Node('home', 'Home', '', {}),
+            Node('nowhere', 'Nowhere', '', {}),
+            Node('animals_category', 'Dogs', 'home', {'url_kwargs': 'kind:dogs'}),
+            Node('animals_category', 'Cats', 'home', {'url_kwargs': 'category:Cats'}),
+            Node('pet', 'Pet', 'animals_category|category:birds', {'url_kwargs': 'category:,name:'}),
+            Node('url-a', 'A', 'url-b', {}),
+            Node('url-b', 'B', 'url-a', {}),
+            Node('url-aa', 'AA', 'url-a', {}),
+        ])
+        self.assertEqual(5, len(errors), errors)
+        self.assertIn("no urlpattern named 'nowhere'", errors[0])
+        self.assertIn("the kwargs ['kind'] don't match the urlpattern's ['category']", errors[1])
+        self.assertIn("can't be reversed", errors[2])
+        self.assertIn("(orphan)", errors[3])
+        self.assertIn("cycle: 'url-a' -> 'url-b' -> 'url-a'", errors[4])
+        self.assertEqual(3, len(warnings), warnings)
+
+    def test_malformed_spec(self):
+        errors, _ = validate_navigation([Node('home', 'Home', 'x|y', {})])
+        self.assertEqual(1, len(errors))
+
+
+class CompileCommandTests(TestCase):
+    def test_compile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'navigations.pickle')
+            out = StringIO()
+            call_command('multinav_compile', output=path, stdout=out)
+            self.assertIn('deep_nested: 15 nodes OK', out.getvalue())
+            navigations = NavigationRegistry()
+            navigations.register('deep_nested', DEEP_NESTED_NODES)
+            navigations.register('main', DEEP_NESTED_NODES)
+            navigations.load_compiled(path)
+        compiled = navigations.get('deep_nested').compiled
+        self.assertIsNot(registry.get('deep_nested').compiled, compiled)
+        self.assertEqual('/a/b/c/d/', compiled.get_static_urls()[9])
+        # a stale artifact isn't used
+        self.assertEqual(get_structure(DEEP_NESTED_NODES), navigations.get('main').compiled.structure)
+        # the requests use the URLs reversed by the command
+        with mock.patch.object(navigation_module, 'registry', navigations), \
+                mock.patch.object(resolvers, 'reverse', wraps=resolvers.reverse) as reverse:
+            self.assertContains(self.client.get('/registered/'), '/a/b/c/d/')
+        self.assertFalse(reverse.called)
+
+    def test_invalid_navigation(self):
+        registry.register('invalid', [Node('nowhere', 'Nowhere', '', {})])
+        try:
+            with self.assertRaises(CommandError):
+                call_command('multinav_compile', check=True, stdout=StringIO(), stderr=StringIO())
+        finally:
+            registry.unregister('invalid')
@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+
+from . import navigation as navigation_module, visibility
+from .conf import Node
+from .navigation import get_navigation
+from .registry import NavigationRegistry
+from .visibility import SUPERUSER, get_permissions_key
+
+CALLS = []
+
+
+def is_beta(request, node):
+    CALLS.append(node.url_name)
+    return request.GET.get('beta') == '1'
+
+
+NODES = [
+    Node('url-a', 'A', '', {}),
+    Node('url-aa', 'AA', 'url-a', {}),
+    Node('url-ab', 'AB', 'url-a', {'permissions': 'app.view_ab'}),
+    Node('url-abc', 'ABC', 'url-ab', {}),
+    Node('url-b', 'B', '', {'permissions': ['app.view_b', 'app.view_ab']}),
+    Node('url-c', 'C', '', {'visible': 'src.multinavigation.test_visibility.is_beta'}),
+    Node('url-ca', 'CA', 'url-c', {}),
+]
+
+
+def get_user(*permissions, superuser=False):
+    return mock.Mock(is_active=True, is_superuser=superuser,
+            get_all_permissions=mock.Mock(return_value=set(permissions)))
+
+
+def get_request(path, user):
+    request = RequestFactory().get(path)
+    request.user = user
+    return request
+
+
+def labels(tree_nodes):
+    return [(n.label, labels(n.children)) for n in tree_nodes]
+
+
+class VisibilityTests(TestCase):
+    def setUp(self):
+        CALLS[:] = []
+
+    def test_permissions(self):
+        tree = get_navigation(get_request('/a/a/', get_user()), NODES).tree
+        self.assertEqual([('A', [('AA', [])])], labels(tree))
+        tree = get_navigation(get_request('/a/a/', get_user('app.view_ab')), NODES).tree
+        self.assertEqual([('A', [('AA', []), ('AB', [('ABC', [])])])], labels(tree))
+        for user in (get_user('app.view_ab', 'app.view_b'), get_user(superuser=True)):
+            tree = get_navigation(get_request('/a/a/', user), NODES).tree
+            self.assertEqual(['A', 'B'], [n.label for n in tree])
+
+    def test_predicate(self):
+        navigation = get_navigation(get_request('/c/a/?beta=1', get_user()), NODES)
+        self.assertEqual(['A', 'C'], [n.label for n in navigation.flat])
+        self.assertEqual(['C', 'CA'], [n.label for n in navigation.breadcrumbs])
+        navigation = get_navigation(get_request('/c/a/', get_user()), NODES)
+        self.assertEqual([('A', [('AA', [])])], labels(navigation.tree))
+        self.assertEqual([], navigation.breadcrumbs)
+        self.assertEqual([], navigation.subnavigation)
+        # called once per request
+        self.assertEqual(['url-c', 'url-c'], CALLS)
+
+    def test_hidden_breadcrumbs(self):
+        navigation = get_navigation(get_request('/a/b/c/', get_user()), NODES)
+        self.assertEqual(['A'], [n.label for n in navigation.breadcrumbs])
+
+    def test_permissions_key(self):
+        self.assertEqual(frozenset(['app.x']), get_permissions_key(get_user('app.x')))
+        self.assertEqual(SUPERUSER, get_permissions_key(get_user(superuser=True)))
+        self.assertEqual(frozenset(), get_permissions_key(None))
+
+    def test_permissions_keys_bounded(self):
+        navigations = NavigationRegistry()
+        registered = navigations.register('nav', NODES)
+        with mock.patch.object(navigation_module, 'registry', navigations), \
+                mock.patch.object(visibility, 'PERMISSIONS_KEYS_SIZE', 2):
+            for permission in ('app.x', 'app.y', 'app.z', 'app.x'):
+                get_navigation(get_request('/c/', get_user(permission)), 'nav').tree
+        keys = [frozenset(['app.z']), frozenset(['app.x'])]
+        self.assertEqual(keys, list(registered.get_shared_subtrees()))
+        self.assertEqual(keys, list(registered.visibility._allowed))
+
+    def test_subtrees_shared_by_permissions(self):
+        navigations = NavigationRegistry()
+        navigations.register('nav', NODES)
+        with mock.patch.object(navigation_module, 'registry', navigations):
+            def get_tree(user, path='/c/'):
+                return get_navigation(get_request(path, user), 'nav').tree
+
+            first = get_tree(get_user('app.view_ab'))
+            second = get_tree(get_user('app.view_ab'))
+            other = get_tree(get_user())
+            self.assertIs(first[0], second[0])
+            self.assertIsNot(first[0], other[0])
+            self.assertEqual(['A', 'AA'], [other[0].label, other[0].children[0].label])
+            # the subtree of C depends on the predicate
+            beta = get_tree(get_user('app.view_ab'), '/a/?beta=1')
+            self.assertEqual(['A', 'C'], [n.label for n in beta])
+            self.assertEqual(['A'], [n.label for n in get_tree(get_user(), '/a/')])
@@ -0,0 +1,60 @@
+def split_path(path):
+    """ Splits an URL path in segments: '/bla/bli/' -> ['bla', 'bli'] """
+    return path.strip('/').split('/')
+
+
+class PathTrie(object):
+    """
+    A trie of URL paths by segment, holding values (e.g. node indexes) at the
+    path they were inserted with. match yields the values of all the paths
+    that are a prefix of a given path, the same way
+    multinavigation.navigation.is_active compares a link with a request path:
+    '/bla/' and '/bla/bli/' are prefixes of '/bla/bli/blu/'.
+    """
+    __slots__ = ('children', 'values')
+
+    def __init__(self):
+        self.children = {}
+        self.values = []
+
+    def insert(self, path, value):
+        node = self
+        for segment in split_path(path):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = PathTrie()
+            node = child
+        node.values.append(value)
+
+    def remove(self, path, value):
+        """ Removes a value inserted with path. Emptied nodes are left. """
+        node = self
+        for segment in split_path(path):
+            node = node.children.get(segment)
+            if node is None:
+                return
+        if value in node.values:
+            node.values.remove(value)
+
+    def match(self, path):
+        """ Yields the values for all prefixes of path, top-down """
+        node = self
+        for segment in split_path(path):
+            node = node.children.get(segment)
+            if node is None:
+                return
+            yield from node.values
+
+
+class RequestPath(object):
+    """ A request path split in segments once, to check many links against it
+    (see multinavigation.navigation.is_active) """
+    __slots__ = ('path', 'prefixes')
+
+    def __init__(self, path):
+        self.path = path
+        segments = split_path(path)
+        self.prefixes = set('/'.join(segments[:i]) for i in range(1, len(segments) + 1))
+
+    def is_active(self, link_url):
+        return link_url.strip('/') in self.prefixes
@@ -0,0 +1,158 @@
+from collections import namedtuple
+from functools import lru_cache
+import hashlib
+
+# Max. number of distinct spec strings kept parsed in memory
+SPEC_CACHE_SIZE = 4096
+
+
+class SpecError(ValueError):
+    """ Raised when a parent spec or a url_kwargs spec can't be parsed """
+
+
+""" A parsed 'url_kwargs' spec: fixed kwargs as a tuple of (key, value) pairs
+and the keys of the placeholders to be filled from the request """
+KwargsSpec = namedtuple('KwargsSpec', 'fixed placeholders')
+
+""" A parsed 'parent' spec: the parent's url_name and the kwargs it has to
+match, as a frozenset of (key, value) pairs """
+ParentSpec = namedtuple('ParentSpec', 'url_name kwargs')
+
+EMPTY_KWARGS_SPEC = KwargsSpec((), ())
+
+
+def match_subset_kwargs(subset_kwargs, kwargs):
+    """ Check that all key-value pairs in subset_kwargs match on kwargs """
+    # Use sets to easily compare both dicts
+    s1 = set(kwargs.items())
+    s2 = set(subset_kwargs.items())
+    is_subset = s2.issubset(s1)
+    return is_subset
+
+
+def split_pairs(string, spec):
+    """ Splits 'kwd_1:val_1, kwd_2:val_2, ...' into stripped (key, value)
+    pairs. spec is the whole spec string, only used for error messages. """
+    pairs = []
+    for pair in string.split(','):
+        chunks = pair.strip().split(':')
+        if len(chunks) != 2:
+            raise SpecError(
+                "Invalid pair {!r} in {!r}, expected 'key:value' or "
+                "'key:'".format(pair, spec))
+        pairs.append((chunks[0].strip(), chunks[1].strip()))
+    return pairs
+
+
+@lru_cache(maxsize=SPEC_CACHE_SIZE)
+def parse_parent_spec(string):
+    """
+    Parse the node's parent parameter (which can be just the url_name or
+    additionally define some kwargs) into a ParentSpec.
+
+    Example: node.parent = 'url_name|kwarg1:value,kwarg2:value'
+
+    """
+    chunks = string.split('|')
+    kwargs = []
+    if len(chunks) > 1:
+        kwargs = [(k, v) for k, v in split_pairs(chunks[1], string) if k and v]
+    return ParentSpec(chunks[0], frozenset(kwargs))
+
+
+@lru_cache(maxsize=SPEC_CACHE_SIZE)
+def parse_kwargs_spec(string):
+    """ Parse a 'kwd_1:val_1, kwd_2:' url_kwargs spec into a KwargsSpec. Keys
+    without a value are placeholders (see get_url_kwargs). """
+    if not string:
+        return EMPTY_KWARGS_SPEC
+    fixed = []
+    placeholders = []
+    for k, v in split_pairs(string, string):
+        if k:
+            if v:
+                fixed.append((k, v))
+            else:
+                placeholders.append(k)
+    return KwargsSpec(tuple(fixed), tuple(placeholders))
+
+
+def get_kwargs_spec(node):
+    """ Returns the parsed url_kwargs spec from the node's context """
+    url_kwargs_str = node.context.get('url_kwargs', '')
+    if not url_kwargs_str:
+        return EMPTY_KWARGS_SPEC
+    return parse_kwargs_spec(str(url_kwargs_str))
+
+
+def parse_url_name_args(string):
+    """
+    Parse and return url_name and kwargs as a tuple from the node's
+    url_name parameter (which can be just the url_name or additionally define
+    some kwargs)
+
+    Example: node['url_name'] = 'url_name|kwarg1:value,kwarg2:value'
+
+    """
+    url_name, kwargs = parse_parent_spec(string)
+    return (url_name, dict(kwargs))
+
+
+def resolve_kwargs(spec, url_match):
+    """ Returns the kwargs dict for a parsed KwargsSpec and the current
+    url_match (see get_url_kwargs) """
+    kwargs = dict(spec.fixed)
+    if not spec.placeholders or not url_match:
+        return kwargs
+    match_kwargs = url_match.kwargs
+    # put all autocompleted kwargs here
+    autocompleted = {}
+    for k in spec.placeholders:
+        v = match_kwargs.get(k, None)
+        if v:
+            autocompleted[k] = v
+    # all kwargs completed from the URL should only be applied,
+    # if the others match
+    if autocompleted and match_subset_kwargs(kwargs, match_kwargs):
+        kwargs.update(autocompleted)
+    return kwargs
+
+
+def get_url_kwargs(url_kwargs_str, url_match):
+    """
+    Any needed url parameters can be defined through these ways:
+
+    1. Through the url_kwargs passed with the node's context.
+
+       Example: {'url_kwargs': 'slug:some_category'}
+
+    2. Through the url path of the request. This is the case, when the
+       url should be built depending on the current url. Example:
+       We've got an url archive/<year>/ and subsets for news, articles, etc.
+       Like this: archive/<year>/news, archive/<year>/articles ... And we
+       want <year> to be set depending the current url.
+       For this to work, the keyword should be present BUT empty on the
+       node's context.
+
+       Example: {'url_kwargs': 'year:'}
+
+    The spec strings are parsed only once (see parse_kwargs_spec).
+    """
+    # url_kwargs_str should be a str in form 'kwd_1:val_1, kwd_2:val_2, ...'...
+    if not url_kwargs_str:
+        return {}
+    return resolve_kwargs(parse_kwargs_spec(str(url_kwargs_str)), url_match)
+
+
+def get_fingerprint(nodes):
+    """ A digest of everything in the nodes which can end up rendered:
+    the structure, the labels (in the active language) and the context """
+    h = hashlib.md5()
+    for n in nodes:
+        if n is None:
+            # a removed node, see multinavigation.registry
+            h.update(b'None')
+            continue
+        context = sorted((k, str(v)) for k, v in n.context.items())
+        h.update(repr((n.url_name, str(n.label), n.parent, context)).encode('utf-8'))
+    return h.hexdigest()
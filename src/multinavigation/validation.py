@@ -0,0 +1,127 @@
+from django.urls import get_resolver
+from django.utils.regex_helper import normalize
+
+from .compiled import CompiledNavigation, get_structure
+from .resolvers import safe_reverse
+from .utils import SpecError
+
+
+def get_url_params(url_name, urlconf=None):
+    """
+    Returns a list of (params, defaults) sets, one for each way the named
+    urlpattern can be reversed, or None if there's no such urlpattern.
+    url_name may be namespaced ('ns:name').
+    """
+    *namespaces, name = url_name.split(':')
+    resolver = get_resolver(urlconf)
+    prefix = ''
+    for ns in namespaces:
+        try:
+            ns_prefix, resolver = resolver.namespace_dict[ns]
+        except KeyError:
+            return None
+        prefix += ns_prefix
+    possibilities = resolver.reverse_dict.getlist(name)
+    if not possibilities:
+        return None
+    params = []
+    for _, pattern, defaults, _ in possibilities:
+        for _, names in normalize(prefix + pattern):
+            params.append((set(names), set(defaults)))
+    return params
+
+
+def describe(index, structure):
+    url_name, parent, url_kwargs = structure[index]
+    return 'node {} ({!r}, parent {!r}, url_kwargs {!r})'.format(index, url_name, parent, url_kwargs)
+
+
+def get_possible_parents(compiled):
+    """
+    Returns the indexes of the nodes each node can be a child of, for any
+    request: placeholders are assumed to match any value.
+    """
+    return [compiled.get_possible_parents(i) for i in range(len(compiled))]
+
+
+def find_cycles(possible_parents):
+    """ Returns the cycles (as lists of indexes) of the parent graph """
+    cycles = []
+    state = {}  # index -> 'visiting' or 'done'
+
+    def visit(i, path):
+        state[i] = 'visiting'
+        path.append(i)
+        for p in possible_parents[i]:
+            if state.get(p) == 'visiting':
+                cycles.append(path[path.index(p):] + [p])
+            elif p not in state:
+                visit(p, path)
+        path.pop()
+        state[i] = 'done'
+
+    for i in range(len(possible_parents)):
+        if i not in state:
+            visit(i, [])
+    return cycles
+
+
+def validate_navigation(nodes, urlconf=None):
+    """
+    Checks a list of nodes against the urlconf. Returns (errors, warnings),
+    two lists of messages:
+
+    errors: specs which can't be parsed, url_names without urlpattern,
+    url_kwargs which don't fit the urlpattern, static nodes which can't be
+    reversed, parents no node matches (orphans) and cycles.
+
+    warnings: nodes which are never shown because none of their ancestors
+    is a root.
+    """
+    structure = get_structure(nodes)
+    try:
+        compiled = CompiledNavigation(structure)
+    except SpecError as e:
+        return [str(e)], []
+    errors = []
+    warnings = []
+    for i, entry in enumerate(structure):
+        if entry is None:
+            # removed
+            continue
+        url_name = entry[0]
+        spec = compiled.kwargs_specs[i]
+        keys = set(k for k, _ in spec.fixed) | set(spec.placeholders)
+        params = get_url_params(url_name, urlconf)
+        if params is None:
+            errors.append('{}: no urlpattern named {!r}'.format(describe(i, structure), url_name))
+        elif not any(not (keys ^ names) - defaults for names, defaults in params):
+            errors.append('{}: the kwargs {} don\'t match the urlpattern\'s {}'.format(
+                describe(i, structure), sorted(keys),
+                ' or '.join(str(sorted(names)) for names, _ in params)))
+        elif not spec.placeholders and not safe_reverse(url_name, dict(spec.fixed), urlconf):
+            errors.append('{}: can\'t be reversed'.format(describe(i, structure)))
+
+    possible_parents = get_possible_parents(compiled)
+    for i, parents in enumerate(possible_parents):
+        if compiled.parent_specs[i] is not None and not parents:
+            errors.append('{}: no node matches the parent (orphan)'.format(describe(i, structure)))
+    for cycle in find_cycles(possible_parents):
+        errors.append('cycle: {}'.format(' -> '.join(
+            repr(structure[i][0]) for i in cycle)))
+
+    reachable = set(compiled.roots)
+    children = {}
+    for i, parents in enumerate(possible_parents):
+        for p in parents:
+            children.setdefault(p, []).append(i)
+    stack = list(compiled.roots)
+    while stack:
+        for c in children.get(stack.pop(), ()):
+            if c not in reachable:
+                reachable.add(c)
+                stack.append(c)
+    for i, parents in enumerate(possible_parents):
+        if i not in reachable and parents:
+            warnings.append('{}: unreachable from the roots'.format(describe(i, structure)))
+    return errors, warnings
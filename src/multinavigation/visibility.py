@@ -0,0 +1,103 @@
+"""
+Showing nodes only to some users.
+
+A node is only shown if the user has all the permissions listed in its
+context as 'permissions' (a codename like 'app_label.codename' or a list of
+them) and if the callable in its context as 'visible' (or the dotted path to
+one), called with the request and the node, returns True:
+
+    Node('reports', _('Reports'), '', {'permissions': 'reports.view_report'})
+    Node('beta', _('Beta'), '', {'visible': 'mysite.navigation.is_beta_tester'})
+
+Hidden nodes are skipped with their whole subtree. Since permissions are
+checked against the set of permissions of the user, the results are kept by
+permission set, so users with the same permissions (e.g. the same groups)
+share them, along with the subtrees built for them (see
+multinavigation.registry). Only the PERMISSIONS_KEYS_SIZE most recently used
+permission sets are kept.
+"""
+from collections import OrderedDict, namedtuple
+
+from django.utils.module_loading import import_string
+
+# The permissions key of active superusers, who have all permissions
+SUPERUSER = 'superuser'
+
+# Max. number of permissions keys the results (and the shared subtrees) are
+# kept for
+PERMISSIONS_KEYS_SIZE = 256
+
+""" What the visibility of a node depends on: a frozenset of permission
+codenames and a predicate (or None) """
+VisibilitySpec = namedtuple('VisibilitySpec', 'permissions predicate')
+
+
+def get_visibility_spec(node):
+    """ Returns the VisibilitySpec of a node, or None if it's always shown """
+    permissions = node.context.get('permissions')
+    predicate = node.context.get('visible')
+    if not permissions and predicate is None:
+        return None
+    if isinstance(permissions, str):
+        permissions = (permissions,)
+    if isinstance(predicate, str):
+        predicate = import_string(predicate)
+    return VisibilitySpec(frozenset(permissions or ()), predicate)
+
+
+def get_permissions_key(user):
+    """ Returns what the permission checks of a user depend on """
+    if user is None:
+        return frozenset()
+    if user.is_active and user.is_superuser:
+        return SUPERUSER
+    return frozenset(user.get_all_permissions())
+
+
+def get_by_permissions_key(cache, permissions_key):
+    """ Returns the dict kept in cache (an OrderedDict) for permissions_key,
+    adding an empty one if needed. The least recently used ones are dropped
+    beyond PERMISSIONS_KEYS_SIZE. """
+    try:
+        cache.move_to_end(permissions_key)
+        return cache[permissions_key]
+    except KeyError:
+        # unknown, or dropped by another thread in between
+        entry = cache[permissions_key] = {}
+    while len(cache) > PERMISSIONS_KEYS_SIZE:
+        try:
+            cache.popitem(last=False)
+        except KeyError:
+            break
+    return entry
+
+
+class Visibility(object):
+    """
+    The visibility specs of a list of nodes (None for removed nodes, see
+    multinavigation.registry), with the results of the permission checks
+    by permissions key. volatile are the indexes of the nodes with a
+    predicate and of their ancestors, whose subtrees can't be shared.
+    """
+
+    def __init__(self, nodes, compiled):
+        self.specs = tuple(None if n is None else get_visibility_spec(n) for n in nodes)
+        self.has_permissions = any(spec and spec.permissions for spec in self.specs)
+        self.predicates = tuple(i for i, spec in enumerate(self.specs) if spec and spec.predicate)
+        self.volatile = frozenset(compiled.get_ancestors(self.predicates))
+        self._allowed = OrderedDict()
+
+    def __bool__(self):
+        return any(self.specs)
+
+    def is_allowed(self, index, permissions_key):
+        """ True if permissions_key grants the permissions of the node at
+        index """
+        allowed = get_by_permissions_key(self._allowed, permissions_key)
+        try:
+            return allowed[index]
+        except KeyError:
+            permissions = self.specs[index].permissions
+            result = allowed[index] = (
+                permissions_key == SUPERUSER or permissions <= permissions_key)
+            return result
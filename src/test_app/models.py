@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class MenuEntry(models.Model):
+    url_name = models.CharField(max_length=100)
+    label = models.CharField(max_length=100)
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE,
+            related_name='children')
+    url_kwargs = models.CharField(max_length=100, blank=True)
+    css_class = models.CharField(max_length=100, blank=True)
+    position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position', 'pk']
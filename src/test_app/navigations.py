@@ -0,0 +1,7 @@
+from .context_processors import multinavigation
+
+DEEP_NESTED_NODES = multinavigation(None)['DEEP_NESTED_MULTINAV_NODES']
+
+
+def main_nodes():
+    return multinavigation(None)['MULTINAV_NODES']
@@ -5,6 +5,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 INSTALLED_APPS = (
      'django.contrib.auth',
      'django.contrib.contenttypes',
@@ -42,10 +48,17 @@ TEMPLATES = [
 # See: http://stackoverflow.com/a/25267435/347942
 MIGRATION_MODULES = {'src.multinavigation': None}
 
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
 SECRET_KEY = 'this-is-just-for-tests-so-not-that-secret'
 
 ROOT_URLCONF = 'src.test_app.urls'
 
+MULTINAV_NAVIGATIONS = {
+    'main': 'src.test_app.navigations.main_nodes',
+    'deep_nested': 'src.test_app.navigations.DEEP_NESTED_NODES',
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -25,4 +25,5 @@ urlpatterns += [
     url(r'^c/a/$', TemplateView.as_view(template_name='nested.html'), name='url-ca'),
     url(r'^c/b/$', TemplateView.as_view(template_name='nested.html'), name='url-cb'),
     url(r'^c/c/$', TemplateView.as_view(template_name='nested.html'), name='url-cc'),
+    url(r'^registered/$', TemplateView.as_view(template_name='registered.html'), name='registered'),
 ]